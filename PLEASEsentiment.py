@@ -1,32 +1,73 @@
 import os
 import csv
+import argparse
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from mentions_io import iter_mention_rows, pick_table_files, find_comments_file, load_comments_by_post, COMMENTS_SAMPLE_SEPARATOR
+from comment_sentiment import COMMENT_SENTIMENT_COLUMNS, split_comments_sample, score_comment_aggregates
+from nickname_matcher import load_nickname_matcher, normalize_text
+from player_names import read_player_list
+from sentiment_cache import SentimentCache, scorer_version
+from vader_batch import VaderBatchScorer
 
 # Ensure VADER lexicon is downloaded.
 # If you haven't run your download_vader.py or done this manually,
 # you might need to run this once:
 # nltk.download('vader_lexicon')
 
+SENTIMENT_CACHE_FILE = os.path.join("data", "new", "sentiment_cache.sqlite3") # Shared with process_sentiment_data.py
+SENTIMENT_CACHE = None # SentimentCache consulted by analyze_sentiment(), opened in main() / each worker
+CHUNK_ROWS = 250 # Rows scored together: their comments form one batch, and one task in --jobs mode
+
 def analyze_sentiment(text, analyzer):
     """
     Analyzes the sentiment of a given text using VADER.
     Returns a dictionary with neg, neu, pos, compound scores.
     Handles None or non-string inputs by returning default scores.
+    Texts already in SENTIMENT_CACHE aren't scored again.
     """
     if not isinstance(text, str):
         text = "" # VADER handles empty strings returning all 0.0
-    
+    if SENTIMENT_CACHE is not None:
+        return SENTIMENT_CACHE.polarity_scores(text, analyzer)
     return analyzer.polarity_scores(text)
 
-def process_csv_file(input_filepath, output_filepath, analyzer):
+def sentiment_row_parts(title_text, body_text, comments_text, player_name, analyzer, matcher=None, comment_parts=()):
     """
-    Reads a CSV file, performs sentiment analysis on specified columns,
-    and writes the results to a new CSV file.
+    The columns added to one row: 3 x (neg, neu, pos, compound), then `comment_parts` (the
+    per-comment aggregates), then the attribution columns.
+    """
+    title_sentiment = analyze_sentiment(title_text, analyzer)
+    body_sentiment = analyze_sentiment(body_text, analyzer)
+    comments_sentiment = analyze_sentiment(comments_text, analyzer)
+
+    new_row_parts = []
+    for sentiment_dict in [title_sentiment, body_sentiment, comments_sentiment]:
+        new_row_parts.extend([
+            sentiment_dict['neg'], sentiment_dict['neu'],
+            sentiment_dict['pos'], sentiment_dict['compound']
+        ])
+    new_row_parts.extend(comment_parts)
+
+    if matcher is not None:
+        matched_players = matcher.matches(f"{title_text}\n{body_text}")
+        row_player_key = normalize_text(player_name) if player_name is not None else None
+        new_row_parts.extend([
+            ";".join(sorted(matched_players)),
+            int(any(normalize_text(p) == row_player_key for p in matched_players))
+        ])
+    return new_row_parts
+
+def open_mentions_for_scoring(input_filepath, with_attribution=False):
+    """
+    Opens a mentions table (CSV or Parquet) for scoring. Returns (output header, rows) where
+    rows lazily yields (row, (title, body, comments text, player, comments)) one input row at a
+    time, where comments is the post's [(body, score), ...], or None if the table lacks the
+    required columns.
     """
-    print(f"Processing {input_filepath}...")
-    processed_rows = []
-    
     # Define new header columns for sentiment scores
     sentiment_headers = []
     for col_prefix in ["title", "body", "comments"]:
@@ -34,64 +75,226 @@ def process_csv_file(input_filepath, output_filepath, analyzer):
             f"{col_prefix}_neg", f"{col_prefix}_neu", 
             f"{col_prefix}_pos", f"{col_prefix}_compound"
         ])
+    sentiment_headers.extend(COMMENT_SENTIMENT_COLUMNS)
 
+    # Rows come from the CSV or Parquet mentions table, as lists of strings
+    reader = iter_mention_rows(input_filepath)
+    header = next(reader)  # Read the header row
+    
+    # Store the indices of the columns to be analyzed
     try:
-        with open(input_filepath, 'r', encoding='utf-8-sig') as infile:
-            reader = csv.reader(infile)
-            header = next(reader)  # Read the header row
-            
-            # Store the indices of the columns to be analyzed
-            try:
-                title_col_idx = header.index("post_title")
-                body_col_idx = header.index("post_body")
-                comments_col_idx = header.index("scraped_comments_sample")
-            except ValueError as e:
-                print(f"  Error: Missing one of the required columns in {input_filepath}: {e}")
-                print(f"  Expected columns: 'post_title', 'post_body', 'scraped_comments_sample'")
-                print(f"  Found headers: {header}")
-                return False
-
-            new_header = header + sentiment_headers
-            processed_rows.append(new_header)
-
-            for row_num, row in enumerate(reader):
-                # Ensure row has enough columns, pad with empty strings if not
-                # This is a safeguard, ideally CSV rows are consistently structured
-                while len(row) < max(title_col_idx, body_col_idx, comments_col_idx) + 1:
-                    row.append("")
-
-                post_title_text = row[title_col_idx]
-                post_body_text = row[body_col_idx]
+        title_col_idx = header.index("post_title")
+        body_col_idx = header.index("post_body")
+        if "scraped_comments_sample" in header:
+            comments_col_idx = header.index("scraped_comments_sample")
+            comments_by_post = None
+        else:
+            # Newer scrapes keep comments in a separate *_reddit_comments table keyed by post_id
+            comments_file = find_comments_file(input_filepath)
+            if comments_file is None:
+                raise ValueError("no 'scraped_comments_sample' column and no comments table found")
+            comments_col_idx = header.index("post_id")
+            comments_by_post = load_comments_by_post(comments_file)
+            print(f"  Reading comments from {comments_file}")
+    except ValueError as e:
+        print(f"  Error: Missing one of the required columns in {input_filepath}: {e}")
+        print(f"  Expected columns: 'post_title', 'post_body', 'scraped_comments_sample' (or 'post_id' + a comments table)")
+        print(f"  Found headers: {header}")
+        return None
+
+    player_col_idx = header.index("player_name_canonical") if "player_name_canonical" in header else None
+    attribution_headers = ["matched_players", "player_mentioned"] if with_attribution else []
+
+    def rows():
+        for row in reader:
+            # Ensure row has enough columns, pad with empty strings if not
+            # This is a safeguard, ideally CSV rows are consistently structured
+            while len(row) < max(title_col_idx, body_col_idx, comments_col_idx) + 1:
+                row.append("")
+
+            if comments_by_post is None:
                 scraped_comments_text = row[comments_col_idx]
+                comments = split_comments_sample(scraped_comments_text)
+            else:
+                comments = comments_by_post.get(row[comments_col_idx], [])
+                scraped_comments_text = COMMENTS_SAMPLE_SEPARATOR.join(body for body, _ in comments)
+            player_name = row[player_col_idx] if player_col_idx is not None else None
+            yield row, (row[title_col_idx], row[body_col_idx], scraped_comments_text, player_name, comments)
+
+    return header + sentiment_headers + attribution_headers, rows()
+
+class ScoredOutput:
+    """
+    Writes scored rows to `output_filepath` as they're produced. Rows go to a temp file that
+    replaces the output on close(), so a failed run leaves any earlier output untouched.
+    """
+
+    def __init__(self, output_filepath, header):
+        self.output_filepath = output_filepath
+        self.tmp_filepath = output_filepath + '.tmp'
+        self.failed = False
+        self._file = open(self.tmp_filepath, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def write(self, row, row_parts):
+        self._writer.writerow(row + row_parts)
+
+    def close(self):
+        self._file.close()
+        os.replace(self.tmp_filepath, self.output_filepath)
+
+    def abort(self):
+        self.failed = True
+        self._file.close()
+        if os.path.exists(self.tmp_filepath):
+            os.remove(self.tmp_filepath)
 
-                title_sentiment = analyze_sentiment(post_title_text, analyzer)
-                body_sentiment = analyze_sentiment(post_body_text, analyzer)
-                comments_sentiment = analyze_sentiment(scraped_comments_text, analyzer)
-
-                new_row_parts = []
-                for sentiment_dict in [title_sentiment, body_sentiment, comments_sentiment]:
-                    new_row_parts.extend([
-                        sentiment_dict['neg'], sentiment_dict['neu'],
-                        sentiment_dict['pos'], sentiment_dict['compound']
-                    ])
-                
-                processed_rows.append(row + new_row_parts)
-        
-        # Write the processed data to the output file
-        with open(output_filepath, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.writer(outfile)
-            writer.writerows(processed_rows)
+def score_rows(row_texts, analyzer, batch_scorer, matcher=None):
+    """
+    The added columns for a chunk of rows (as yielded by open_mentions_for_scoring()). Every
+    comment in the chunk is scored separately, in one batch, for the per-comment aggregates.
+    """
+    comment_parts = score_comment_aggregates([texts[4] for texts in row_texts], batch_scorer, SENTIMENT_CACHE)
+    return [sentiment_row_parts(*texts[:4], analyzer, matcher, comment_parts=parts)
+            for texts, parts in zip(row_texts, comment_parts)]
+
+def process_csv_file(input_filepath, output_filepath, analyzer, matcher=None, batch_scorer=None, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a mentions table (CSV or Parquet), performs sentiment analysis on
+    specified columns, and streams the results to a new CSV file `chunk_rows` rows at a time.
+    With a NicknameMatcher, also tags each post with the players its title/body mention
+    and whether the row's own player is one of them.
+    """
+    print(f"Processing {input_filepath}...")
+    output = None
+    try:
+        table = open_mentions_for_scoring(input_filepath, with_attribution=matcher is not None)
+        if table is None:
+            return False
+        header, rows = table
+        batch_scorer = batch_scorer or VaderBatchScorer(analyzer)
+        output = ScoredOutput(output_filepath, header)
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            for (row, _), row_parts in zip(chunk, score_rows([texts for _, texts in chunk], analyzer, batch_scorer, matcher)):
+                output.write(row, row_parts)
+        output.close()
         print(f"  Successfully processed. Output saved to {output_filepath}")
         return True
 
     except FileNotFoundError:
         print(f"  Error: File not found {input_filepath}")
-        return False
     except Exception as e:
         print(f"  Error processing file {input_filepath}: {e}")
-        return False
+    if output is not None:
+        output.abort()
+    return False
+
+# --- Process-pool mode (--jobs N) ---
+# Each worker process builds its own analyzer; the parent streams the tables, ships row texts
+# out in chunks and writes each chunk back in its original place.
+MAX_PENDING_CHUNKS_PER_JOB = 4 # Chunks in flight per worker; bounds the rows held in memory
+
+_worker_analyzer = None
+_worker_batch_scorer = None
+_worker_matcher = None
+
+def _init_sentiment_worker(matcher, cache_path=None):
+    global _worker_analyzer, _worker_batch_scorer, _worker_matcher, SENTIMENT_CACHE
+    _worker_analyzer = SentimentIntensityAnalyzer()
+    _worker_batch_scorer = VaderBatchScorer(_worker_analyzer)
+    _worker_matcher = matcher
+    if cache_path:
+        SENTIMENT_CACHE = SentimentCache(cache_path, version=scorer_version(_worker_analyzer))
+
+def _score_chunk(texts):
+    """Scores a chunk in a worker. Returns (row parts, cache hits, cache misses) for the chunk."""
+    hits, misses = (SENTIMENT_CACHE.hits, SENTIMENT_CACHE.misses) if SENTIMENT_CACHE else (0, 0)
+    row_parts = score_rows(texts, _worker_analyzer, _worker_batch_scorer, _worker_matcher)
+    if SENTIMENT_CACHE is None:
+        return row_parts, 0, 0
+    SENTIMENT_CACHE.flush() # Workers have no shutdown hook, so every chunk's new scores are committed
+    return row_parts, SENTIMENT_CACHE.hits - hits, SENTIMENT_CACHE.misses - misses
+
+def _write_pending(pending, limit):
+    """
+    Writes queued chunks, oldest first, until at most `limit` are left in flight.
+    An entry without rows marks the end of its file. Returns the number of files completed.
+    Workers' cache hits/misses are added to the parent's SENTIMENT_CACHE counts.
+    """
+    completed = 0
+    while len(pending) > limit:
+        input_filepath, output, rows, future = pending.popleft()
+        if output.failed:
+            continue
+        try:
+            if rows is None:
+                output.close()
+                print(f"  Successfully processed {input_filepath}. Output saved to {output.output_filepath}")
+                completed += 1
+                continue
+            chunk_parts, hits, misses = future.result()
+            if SENTIMENT_CACHE is not None:
+                SENTIMENT_CACHE.hits += hits
+                SENTIMENT_CACHE.misses += misses
+            for row, row_parts in zip(rows, chunk_parts):
+                output.write(row, row_parts)
+        except Exception as e:
+            print(f"  Error processing file {input_filepath}: {e}")
+            output.abort()
+    return completed
+
+def process_files_parallel(file_pairs, jobs, matcher=None, chunk_rows=CHUNK_ROWS, cache_path=None):
+    """
+    Scores [(input_filepath, output_filepath), ...] on a pool of `jobs` processes, streaming
+    each file through in `chunk_rows` chunks. Output is byte-identical to process_csv_file().
+    Returns the number of files processed successfully.
+    """
+    succeeded = 0
+    max_pending = jobs * MAX_PENDING_CHUNKS_PER_JOB
+    pending = deque() # (input_filepath, output, rows, future); rows None = end of file
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_sentiment_worker,
+                             initargs=(matcher, cache_path)) as executor:
+        for input_filepath, output_filepath in file_pairs:
+            print(f"Processing {input_filepath}...")
+            output = None
+            try:
+                table = open_mentions_for_scoring(input_filepath, with_attribution=matcher is not None)
+                if table is None:
+                    continue
+                header, rows = table
+                output = ScoredOutput(output_filepath, header)
+                while not output.failed:
+                    chunk = list(islice(rows, chunk_rows))
+                    if not chunk:
+                        break
+                    future = executor.submit(_score_chunk, [texts for _, texts in chunk])
+                    pending.append((input_filepath, output, [row for row, _ in chunk], future))
+                    succeeded += _write_pending(pending, max_pending)
+                pending.append((input_filepath, output, None, None))
+            except FileNotFoundError:
+                print(f"  Error: File not found {input_filepath}")
+                if output is not None:
+                    output.abort()
+            except Exception as e:
+                print(f"  Error processing file {input_filepath}: {e}")
+                if output is not None:
+                    output.abort()
+        succeeded += _write_pending(pending, 0)
+    return succeeded
 
 def main():
+    parser = argparse.ArgumentParser(description="VADER sentiment scoring of the scraped Reddit mentions tables.")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Worker processes; files are split into row chunks and scored in parallel (default: 1, serial)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"Score every text again instead of reusing scores from {SENTIMENT_CACHE_FILE}")
+    args = parser.parse_args()
+    global SENTIMENT_CACHE
+
     # Define base directory (assuming script is in NBA-Sentiment-Project root)
     base_dir = os.getcwd() 
     
@@ -112,13 +315,31 @@ def main():
         print("VADER lexicon not found. Please run your download_vader.py script or nltk.download('vader_lexicon')")
         return
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".csv"):
-            input_filepath = os.path.join(input_dir, filename)
-            output_filename = f"{os.path.splitext(filename)[0]}_sentiment.csv"
-            output_filepath = os.path.join(output_dir, output_filename)
-            
-            process_csv_file(input_filepath, output_filepath, analyzer)
+    # Per-player attribution: which tracked players each post actually names
+    matcher = load_nickname_matcher(os.path.join(base_dir, "data", "json", "nicknames.json"), read_player_list())
+
+    # Parquet tables are read directly; a CSV export of the same table is skipped
+    file_pairs = []
+    for input_filepath in pick_table_files(os.path.join(input_dir, f) for f in os.listdir(input_dir)):
+        filename = os.path.basename(input_filepath)
+        output_filename = f"{os.path.splitext(filename)[0]}_sentiment.csv"
+        output_filepath = os.path.join(output_dir, output_filename)
+        file_pairs.append((input_filepath, output_filepath))
+
+    cache_path = None if args.no_cache else os.path.join(base_dir, SENTIMENT_CACHE_FILE)
+    if cache_path:
+        SENTIMENT_CACHE = SentimentCache(cache_path, version=scorer_version(analyzer))
+
+    if args.jobs > 1:
+        process_files_parallel(file_pairs, args.jobs, matcher, cache_path=cache_path)
+    else:
+        batch_scorer = VaderBatchScorer(analyzer)
+        for input_filepath, output_filepath in file_pairs:
+            process_csv_file(input_filepath, output_filepath, analyzer, matcher, batch_scorer)
+
+    if SENTIMENT_CACHE is not None:
+        print(SENTIMENT_CACHE.summary())
+        SENTIMENT_CACHE.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+# benchmark_fetch.py
+"""
+Measures end-to-end Reddit fetch throughput offline, against fake_reddit_server.py.
+
+Starts the stand-in on a local port, points the fetcher's PRAW clients at it and runs the
+normal (player, search interval, subreddit) jobs through run_fetch_jobs(). Reports mentions per
+minute, API calls per saved mention, 429s and time spent waiting on the rate limiter.
+
+    python benchmark_fetch.py --workers 4 --max-dates 20
+    python benchmark_fetch.py --synthetic-days 30 --latency-ms 50 200 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import fetch_reddit_data_comprehensive as fetcher
+import fake_reddit_server
+from comment_scheduler import CommentExpansionScheduler
+from fetch_telemetry import FetchTelemetry
+from nickname_matcher import load_nickname_matcher
+from player_names import read_player_list
+from reddit_store import RedditPostStore
+
+
+def build_jobs(player_names, seasons, max_dates):
+    """Same jobs __main__ plans, limited to each player's `max_dates` most recent game dates."""
+    queries = fetcher.load_player_nicknames(fetcher.PLAYER_NICKNAMES_FILE)
+    jobs = []
+    for player_name in player_names:
+        or_query = fetcher.player_or_query(queries, player_name) or f'"{player_name}"'
+        game_dates = fetcher.get_player_game_dates(player_name, seasons)
+        if max_dates:
+            game_dates = game_dates[-max_dates:] # Recorded posts cover the latest season
+        team_subreddit = fetcher.PLAYER_TEAM_SUBREDDITS.get(player_name)
+        jobs.extend((player_name, or_query, interval, subreddit_name)
+                    for interval in fetcher.merge_game_windows(game_dates)
+                    for subreddit_name in fetcher.get_subreddits_to_query(team_subreddit))
+    return jobs
+
+
+def run_benchmark(args):
+    if args.synthetic_days:
+        start = datetime.strptime(args.synthetic_start, '%Y-%m-%d').date()
+        corpus = fake_reddit_server.generate_synthetic_posts(
+            fake_reddit_server.load_player_names(), ['nba', 'nbadiscussion', 'lakers'], start, args.synthetic_days)
+    else:
+        corpus = fake_reddit_server.load_recorded_posts()
+    state = fake_reddit_server.FakeRedditState(corpus, budget=args.budget, window_seconds=args.window_seconds,
+                                               latency_ms=tuple(args.latency_ms), error_rate=args.error_rate)
+    server, base_url = fake_reddit_server.start_background_server(state)
+
+    work_dir = tempfile.mkdtemp(prefix='fetch_benchmark_')
+    fetcher.REDDIT_API_BASE_URL = base_url
+    fetcher.REDDIT_OUTPUT_DIR = work_dir
+    fetcher.FETCH_JOURNAL = None
+    fetcher.FETCH_TELEMETRY = FetchTelemetry()
+    fetcher.POST_STORE = None if args.no_store else RedditPostStore(os.path.join(work_dir, 'store.sqlite3'))
+
+    player_names = read_player_list()[:args.players] if args.players else read_player_list()
+    jobs = build_jobs(player_names, args.seasons, args.max_dates)
+    fetcher.COMMENT_SCHEDULER = CommentExpansionScheduler(calls_per_run=args.expansion_calls_per_run,
+                                                          calls_per_player=args.expansion_calls_per_player)
+    fetcher.NICKNAME_MATCHER = load_nickname_matcher(fetcher.PLAYER_NICKNAMES_FILE, player_names)
+    if args.firehose:
+        fetcher.FIREHOSE_MODE = True
+        fetcher.FIREHOSE_SINCE = min(fetcher.game_dates_window(interval)[0].timestamp() for _, _, interval, _ in jobs)
+
+    if not args.no_coalesce:
+        fetcher.plan_search_groups(jobs)
+
+    mentions = 0
+    comments = 0
+    started = time.time()
+    for _, (rows, comment_rows) in fetcher.run_fetch_jobs(jobs, workers=args.workers):
+        mentions += len(rows)
+        comments += len(comment_rows)
+    elapsed = time.time() - started
+
+    stats = state.stats()
+    telemetry = fetcher.FETCH_TELEMETRY.summary(mentions_saved=mentions)
+    server.shutdown()
+    if fetcher.POST_STORE is not None:
+        fetcher.POST_STORE.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'jobs': len(jobs),
+        'workers': args.workers,
+        'firehose': args.firehose,
+        'elapsed_seconds': round(elapsed, 2),
+        'mentions': mentions,
+        'comments': comments,
+        'mentions_per_minute': round(mentions / elapsed * 60, 1) if elapsed else None,
+        'api_calls': stats['api_calls'],
+        'api_calls_by_endpoint': stats['calls'],
+        'api_calls_per_mention': round(stats['api_calls'] / mentions, 3) if mentions else None,
+        'expansion_calls_spent': fetcher.COMMENT_SCHEDULER.calls_spent,
+        'expansion_calls_declined': fetcher.COMMENT_SCHEDULER.calls_denied,
+        'throttled_429': stats['throttled'],
+        'bytes_received': stats['bytes_sent'],
+        'rate_limiter_wait_seconds': round(fetcher.RATE_LIMITER.total_wait_seconds, 2),
+        'sleep_fraction': round(telemetry['sleep_fraction'], 3),
+        'latency_p50_p95_by_call': {call_type: (round(call_stats['latency_p50'], 4), round(call_stats['latency_p95'], 4))
+                                    for call_type, call_stats in telemetry['calls'].items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Reddit fetcher against a local API stand-in.")
+    parser.add_argument('--workers', type=int, default=fetcher.FETCH_WORKERS)
+    parser.add_argument('--players', type=int, default=0, help="Only the first N players of players.txt (0 = all)")
+    parser.add_argument('--max-dates', type=int, default=10, help="Most recent game dates per player (0 = all)")
+    parser.add_argument('--seasons', nargs='+', default=["2022", "2023", "2024"])
+    parser.add_argument('--synthetic-days', type=int, default=0,
+                        help="Serve synthetic posts for this many days instead of the recorded mentions")
+    parser.add_argument('--synthetic-start', default='2024-10-22', help="First synthetic day (YYYY-MM-DD)")
+    parser.add_argument('--latency-ms', type=float, nargs=2, default=[20, 80], metavar=('MIN', 'MAX'))
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of API calls answered with 429")
+    parser.add_argument('--budget', type=int, default=fake_reddit_server.RATELIMIT_BUDGET,
+                        help="Requests per rate-limit window")
+    parser.add_argument('--window-seconds', type=int, default=fake_reddit_server.RATELIMIT_WINDOW_SECONDS)
+    parser.add_argument('--firehose', action='store_true', help="Page the firehose subreddits instead of searching")
+    parser.add_argument('--expansion-calls-per-run', type=int, default=fetcher.COMMENT_EXPANSION_CALLS_PER_RUN)
+    parser.add_argument('--expansion-calls-per-player', type=int, default=fetcher.COMMENT_EXPANSION_CALLS_PER_PLAYER)
+    parser.add_argument('--no-coalesce', action='store_true', help="Search every player separately")
+    parser.add_argument('--no-store', action='store_true', help="Run without the on-disk post store")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>28}: {value}")
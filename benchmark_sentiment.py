@@ -0,0 +1,89 @@
+# benchmark_sentiment.py
+"""
+Checks vader_batch.VaderBatchScorer against nltk's SentimentIntensityAnalyzer on the scraped
+mentions and times both.
+
+Collects every title, body and comments text PLEASEsentiment.py would score from the tables in
+data/new/reddit_data, scores them one at a time with polarity_scores() and in batches with
+score_batch(), and reports the largest difference per score column and the speedup. Exits
+non-zero if any score differs by more than --tolerance.
+
+    python benchmark_sentiment.py
+    python benchmark_sentiment.py --batch-size 5000 --limit 20000 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from mentions_io import pick_table_files
+from PLEASEsentiment import open_mentions_for_scoring
+from vader_batch import SCORE_COLUMNS, VaderBatchScorer
+
+
+def load_texts(input_dir, limit=0):
+    """The title, body and comments texts of every mentions table in input_dir, in file order."""
+    texts = []
+    for path in pick_table_files(os.path.join(input_dir, f) for f in sorted(os.listdir(input_dir))):
+        opened = open_mentions_for_scoring(path)
+        if opened is None:
+            continue
+        for _, row_texts in opened[1]:
+            texts.extend(text if isinstance(text, str) else "" for text in row_texts[:3])
+            if limit and len(texts) >= limit:
+                return texts[:limit]
+    return texts
+
+
+def run_benchmark(args):
+    texts = load_texts(args.input_dir, args.limit)
+    analyzer = SentimentIntensityAnalyzer()
+
+    started = time.time()
+    expected = np.array([[analyzer.polarity_scores(text)[k] for k in SCORE_COLUMNS] for text in texts])
+    nltk_seconds = time.time() - started
+
+    started = time.time()
+    scorer = VaderBatchScorer(analyzer)
+    compile_seconds = time.time() - started
+    started = time.time()
+    batches = [scorer.score_batch(texts[i:i + args.batch_size]) for i in range(0, len(texts), args.batch_size)]
+    actual = np.vstack(batches) if batches else np.zeros((0, len(SCORE_COLUMNS)))
+    batch_seconds = time.time() - started
+
+    diff = np.abs(actual - expected)
+    return {
+        'texts': len(texts),
+        'tokens_interned': len(scorer._token_ids),
+        'batch_size': args.batch_size,
+        'nltk_seconds': round(nltk_seconds, 3),
+        'compile_seconds': round(compile_seconds, 3),
+        'batch_seconds': round(batch_seconds, 3),
+        'speedup': round(nltk_seconds / batch_seconds, 2) if batch_seconds else None,
+        'max_abs_diff': {k: float(diff[:, i].max()) if len(texts) else 0.0 for i, k in enumerate(SCORE_COLUMNS)},
+        'texts_over_tolerance': int((diff > args.tolerance).any(axis=1).sum()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check and benchmark of the batched VADER scorer.")
+    parser.add_argument('--input-dir', default=os.path.join("data", "new", "reddit_data"))
+    parser.add_argument('--batch-size', type=int, default=10000, help="Texts per score_batch() call")
+    parser.add_argument('--limit', type=int, default=0, help="Only the first N texts (0 = all)")
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>20}: {value}")
+    if report['texts_over_tolerance']:
+        sys.exit(1)
@@ -0,0 +1,66 @@
+# comment_scheduler.py
+
+import logging
+import math
+import threading
+from bisect import bisect_right, insort
+
+
+def expansion_value(score, num_comments, hours_from_tipoff, decay_hours=12):
+    """
+    Expected value of expanding a post's comment tree: busy, upvoted threads posted
+    close to tip-off carry the most game-related sentiment.
+    """
+    engagement = math.log1p(max(score or 0, 0)) + math.log1p(max(num_comments or 0, 0))
+    return engagement / (1 + abs(hours_from_tipoff) / decay_hours)
+
+
+class CommentExpansionScheduler:
+    """
+    Spends a per-run and/or per-player budget of replace_more() calls on the posts
+    where they matter most. Each post registers its expansion value; a post may spend
+    another call only while the share of budget left is at least the share of posts
+    seen so far that rank above it. The best posts can draw the budget down to zero,
+    while middling ones stop once it's half spent. Budgets of None are unlimited.
+    Safe to share between threads.
+    """
+
+    def __init__(self, calls_per_run=None, calls_per_player=None):
+        self.calls_per_run = calls_per_run
+        self.calls_per_player = calls_per_player
+        self.calls_spent = 0
+        self.calls_by_player = {}
+        self.calls_denied = 0
+        self._values_seen = []
+        self._lock = threading.Lock()
+
+    def register(self, value):
+        with self._lock:
+            insort(self._values_seen, value)
+
+    def _left_fraction(self, player_name):
+        fractions = [1.0]
+        if self.calls_per_run is not None:
+            fractions.append(1 - self.calls_spent / self.calls_per_run if self.calls_per_run else 0.0)
+        if self.calls_per_player is not None:
+            spent = self.calls_by_player.get(player_name, 0)
+            fractions.append(1 - spent / self.calls_per_player if self.calls_per_player else 0.0)
+        return min(fractions)
+
+    def try_spend(self, player_name, value):
+        """Reserves one expansion call for a post of the given value. Returns False if it isn't worth it."""
+        with self._lock:
+            left = self._left_fraction(player_name)
+            percentile = bisect_right(self._values_seen, value) / len(self._values_seen) if self._values_seen else 1.0
+            if left <= 0 or left < 1 - percentile:
+                self.calls_denied += 1
+                return False
+            self.calls_spent += 1
+            self.calls_by_player[player_name] = self.calls_by_player.get(player_name, 0) + 1
+            return True
+
+    def log_summary(self):
+        with self._lock:
+            logging.info(f"Comment expansion: {self.calls_spent} calls spent "
+                         f"(budget per run: {self.calls_per_run}, per player: {self.calls_per_player}), "
+                         f"{self.calls_denied} declined; by player: {self.calls_by_player}")
@@ -0,0 +1,75 @@
+# comment_sentiment.py
+
+import numpy as np
+
+from mentions_io import COMMENTS_SAMPLE_SEPARATOR
+from vader_batch import SCORE_COLUMNS
+
+# Per-post features from scoring each comment on its own instead of the joined comments text
+COMMENT_SENTIMENT_COLUMNS = [
+    'comments_count', 'comments_weighted_compound', 'comments_compound_std',
+    'comments_pos_share', 'comments_neg_share'
+]
+# VADER's usual cut-offs for calling a text positive / negative
+POSITIVE_COMPOUND = 0.05
+NEGATIVE_COMPOUND = -0.05
+
+
+def split_comments_sample(comments_text):
+    """The comments in an old ' || '-joined scraped_comments_sample value, as (body, None) pairs (no scores were kept)."""
+    if not isinstance(comments_text, str):
+        return []
+    return [(body, None) for body in comments_text.split(COMMENTS_SAMPLE_SEPARATOR)]
+
+
+def comment_weight(score):
+    """A comment at score s counts s + 1 times; downvoted comments and unknown scores count once."""
+    if score is None:
+        return 1.0
+    return float(max(score, 0) + 1)
+
+
+def score_comment_aggregates(posts_comments, batch_scorer, cache=None):
+    """
+    Per-comment sentiment for a chunk of posts. `posts_comments` holds each post's
+    [(body, score), ...]; every comment of the chunk is scored in one batch_scorer.score_batch()
+    call (through `cache`, a SentimentCache, when given). Blank comments are skipped.
+
+    Returns one row of COMMENT_SENTIMENT_COLUMNS per post: comment count, then the upvote-weighted
+    mean and standard deviation of the comments' compound scores and the weighted shares of
+    positive and negative comments. Posts without comments get a count of 0 and blanks.
+    """
+    bodies, weights, counts = [], [], []
+    for comments in posts_comments:
+        kept = [(body, score) for body, score in comments if isinstance(body, str) and body.strip()]
+        bodies.extend(body for body, _ in kept)
+        weights.extend(comment_weight(score) for _, score in kept)
+        counts.append(len(kept))
+    if not bodies:
+        return [[0, None, None, None, None] for _ in counts]
+
+    if cache is not None:
+        compounds = np.array([scores['compound'] for scores in cache.polarity_scores_batch(bodies, batch_scorer)])
+    else:
+        compounds = batch_scorer.score_batch(bodies)[:, SCORE_COLUMNS.index('compound')]
+    weights = np.array(weights)
+    counts = np.array(counts)
+    post_of = np.repeat(np.arange(len(counts)), counts)
+
+    def weighted_mean(values):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.bincount(post_of, weights=weights * values, minlength=len(counts)) / total_weight
+
+    total_weight = np.bincount(post_of, weights=weights, minlength=len(counts))
+    mean = weighted_mean(compounds)
+    std = np.sqrt(weighted_mean((compounds - mean[post_of]) ** 2))
+    pos_share = weighted_mean(compounds >= POSITIVE_COMPOUND)
+    neg_share = weighted_mean(compounds <= NEGATIVE_COMPOUND)
+
+    aggregates = []
+    for i, count in enumerate(counts.tolist()):
+        if count:
+            aggregates.append([count] + [round(float(column[i]), 4) for column in (mean, std, pos_share, neg_share)])
+        else:
+            aggregates.append([0, None, None, None, None])
+    return aggregates
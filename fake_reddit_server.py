@@ -0,0 +1,318 @@
+# fake_reddit_server.py
+"""
+Local stand-in for the parts of the Reddit API the fetcher uses, so fetcher changes can be
+load-tested without burning real quota.
+
+Serves subreddit search listings, comment trees (with "load more" stubs that PRAW expands
+through /api/morechildren) and app-only OAuth tokens. Every response carries realistic
+x-ratelimit-* headers from a fixed window budget; latency and 429s can be injected.
+
+Posts come from the recorded *_reddit_mentions files in data/new/reddit_data (with their
+scraped comments), or from a synthetic generator.
+
+Point PRAW at it with oauth_url/reddit_url, e.g. run this script and then:
+    REDDIT_API_BASE_URL=http://127.0.0.1:8765 python fetch_reddit_data_comprehensive.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from mentions_io import (iter_mention_rows, pick_table_files, find_comments_file, load_comments,
+                         COMMENTS_SAMPLE_SEPARATOR)
+
+# --- Configuration ---
+RECORDED_DATA_DIR = 'data/new/reddit_data'
+PLAYER_NICKNAMES_FILE = 'data/json/nicknames.json'
+DEFAULT_PORT = 8765
+
+RATELIMIT_WINDOW_SECONDS = 600
+RATELIMIT_BUDGET = 1000 # Requests per window, like Reddit's 100 QPM for OAuth clients
+INITIAL_COMMENTS_PER_POST = 10 # The rest sit behind a "load more" stub, so replace_more has work to do
+MAX_LISTING_LIMIT = 100
+
+
+def parse_reddit_timestamp(value):
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').timestamp()
+
+
+def load_recorded_posts(data_dir=RECORDED_DATA_DIR):
+    """Builds the post corpus from previously scraped mentions tables, one entry per post_id."""
+    posts = {}
+    for path in pick_table_files(os.path.join(data_dir, f) for f in os.listdir(data_dir)):
+        if '_reddit_mentions' not in os.path.basename(str(path)):
+            continue
+        rows = iter_mention_rows(str(path))
+        header = next(rows)
+        comments_by_post = {}
+        comments_file = find_comments_file(str(path))
+        if comments_file:
+            for comment in load_comments(comments_file).to_dict('records'):
+                comments_by_post.setdefault(str(comment['post_id']), []).append(comment['body'])
+        for row in rows:
+            record = dict(zip(header, row))
+            post_id = record['post_id']
+            if post_id in posts:
+                continue
+            if 'scraped_comments_sample' in record:
+                bodies = [b for b in record['scraped_comments_sample'].split(COMMENTS_SAMPLE_SEPARATOR) if b]
+            else:
+                bodies = comments_by_post.get(post_id, [])
+            posts[post_id] = make_post(post_id, record['subreddit'], record['post_title'], record['post_body'],
+                                       int(float(record['post_score'] or 0)),
+                                       parse_reddit_timestamp(record['post_created_utc']), bodies,
+                                       num_comments=int(float(record['post_num_comments_total'] or 0)))
+    return list(posts.values())
+
+
+def generate_synthetic_posts(player_names, subreddits, start_date, days, posts_per_day=40, seed=0):
+    """Random posts mentioning the tracked players (or nobody), spread over `days` days."""
+    rng = random.Random(seed)
+    moods = ["is cooking tonight", "looked lost out there", "dropped 40 again", "needs to be traded",
+             "is the best in the league", "had an awful shooting night", "carried the whole team"]
+    posts = []
+    for day in range(days):
+        day_start = datetime.combine(start_date + timedelta(days=day), datetime.min.time()).timestamp()
+        for i in range(posts_per_day):
+            subject = rng.choice(player_names + ["The refs", "This team"])
+            title = f"{subject} {rng.choice(moods)}"
+            bodies = [f"{rng.choice(player_names)} {rng.choice(moods)}" for _ in range(rng.randint(0, 80))]
+            post_id = f"s{day:04d}{i:03d}"
+            posts.append(make_post(post_id, rng.choice(subreddits), title, "", rng.randint(0, 3000),
+                                   day_start + rng.uniform(0, 86400), bodies))
+    return posts
+
+
+def make_post(post_id, subreddit, title, selftext, score, created_utc, comment_bodies, num_comments=None):
+    comments = [{'id': f"{post_id}c{i}", 'body': body, 'score': max(1, score // (i + 2)),
+                 'created_utc': created_utc + 60 * (i + 1)} for i, body in enumerate(comment_bodies)]
+    return {'id': post_id, 'subreddit': subreddit, 'title': title, 'selftext': selftext, 'score': score,
+            'created_utc': created_utc, 'comments': comments,
+            'num_comments': max(num_comments or 0, len(comments))}
+
+
+class FakeRedditState:
+    """Corpus, rate-limit window, fault injection settings and per-endpoint call counters."""
+
+    def __init__(self, posts, budget=RATELIMIT_BUDGET, window_seconds=RATELIMIT_WINDOW_SECONDS,
+                 latency_ms=(20, 80), error_rate=0.0, seed=0):
+        self.posts_by_id = {p['id']: p for p in posts}
+        self.posts_by_subreddit = {}
+        for post in sorted(posts, key=lambda p: p['created_utc'], reverse=True): # Newest first, like sort=new
+            self.posts_by_subreddit.setdefault(post['subreddit'].lower(), []).append(post)
+        self.comments_by_id = {c['id']: (p, c) for p in posts for c in p['comments']}
+        self.budget = budget
+        self.window_seconds = window_seconds
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._window_start = time.time()
+        self._used = 0
+
+    def start_request(self, endpoint):
+        """Counts the call and returns (used, remaining, reset_in, throttle)."""
+        with self.lock:
+            now = time.time()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start = now
+                self._used = 0
+            self._used += 1
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            remaining = max(self.budget - self._used, 0)
+            reset_in = self.window_seconds - (now - self._window_start)
+            throttle = remaining <= 0 or (endpoint != 'token' and self.rng.random() < self.error_rate)
+            if throttle:
+                self.throttled += 1
+            latency = self.rng.uniform(*self.latency_ms) / 1000.0
+        time.sleep(latency)
+        return self._used, remaining, reset_in, throttle
+
+    def stats(self):
+        with self.lock:
+            return {'calls': dict(self.calls), 'total_calls': sum(self.calls.values()),
+                    'api_calls': sum(n for endpoint, n in self.calls.items() if endpoint not in ('token', 'stats')),
+                    'throttled': self.throttled, 'bytes_sent': self.bytes_sent}
+
+
+def submission_json(post):
+    return {'kind': 't3', 'data': {
+        'id': post['id'], 'name': f"t3_{post['id']}", 'title': post['title'], 'selftext': post['selftext'],
+        'score': post['score'], 'num_comments': post['num_comments'], 'created_utc': post['created_utc'],
+        'subreddit': post['subreddit'], 'author': 'fake_user', 'is_self': True,
+        'permalink': f"/r/{post['subreddit']}/comments/{post['id']}/fake/",
+        'url': f"https://www.reddit.com/r/{post['subreddit']}/comments/{post['id']}/fake/"}}
+
+
+def comment_json(post, comment):
+    return {'kind': 't1', 'data': {
+        'id': comment['id'], 'name': f"t1_{comment['id']}", 'body': comment['body'], 'score': comment['score'],
+        'created_utc': comment['created_utc'], 'parent_id': f"t3_{post['id']}", 'link_id': f"t3_{post['id']}",
+        'subreddit': post['subreddit'], 'author': 'fake_commenter', 'replies': '', 'depth': 0}}
+
+
+def listing_json(children, after=None):
+    return {'kind': 'Listing', 'data': {'after': after, 'before': None, 'dist': len(children), 'children': children}}
+
+
+def search_terms(query):
+    """Lower-cased terms of a '"A" OR "B"' query; unquoted queries are treated as one term."""
+    terms = re.findall(r'"((?:[^"\\]|\\.)*)"', query)
+    return [t.replace('\\"', '"').lower() for t in terms] or [query.lower()]
+
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None # FakeRedditState, set by make_server()
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output readable
+
+    def _send_json(self, payload, status=200, ratelimit=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        if ratelimit is not None:
+            used, remaining, reset_in = ratelimit
+            self.send_header('x-ratelimit-used', str(used))
+            self.send_header('x-ratelimit-remaining', f"{float(remaining):.1f}")
+            self.send_header('x-ratelimit-reset', str(int(reset_in)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.state.lock:
+            self.state.bytes_sent += len(body)
+
+    def _read_form(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+
+    def do_GET(self):
+        self._dispatch(dict((k, v[0]) for k, v in parse_qs(urlparse(self.path).query).items()))
+
+    def do_POST(self):
+        self._dispatch(self._read_form())
+
+    def _dispatch(self, params):
+        path = urlparse(self.path).path.rstrip('/')
+        if path == '/__stats':
+            return self._send_json(self.state.stats())
+        if path == '/api/v1/access_token':
+            self.state.start_request('token')
+            return self._send_json({'access_token': 'fake-token', 'token_type': 'bearer',
+                                    'expires_in': 86400, 'scope': '*'})
+
+        search = re.match(r'^/r/([^/]+)/search$', path)
+        comments = re.match(r'^/comments/([^/]+)', path)
+        new_listing = re.match(r'^/r/([^/]+)/new$', path)
+        if search:
+            endpoint = 'search'
+        elif comments:
+            endpoint = 'comments'
+        elif new_listing:
+            endpoint = 'new'
+        elif path == '/api/morechildren':
+            endpoint = 'morechildren'
+        else:
+            return self._send_json({'message': 'Not Found', 'error': 404}, status=404)
+
+        used, remaining, reset_in, throttle = self.state.start_request(endpoint)
+        ratelimit = (used, remaining, reset_in)
+        if throttle:
+            return self._send_json({'message': 'Too Many Requests', 'error': 429}, status=429, ratelimit=ratelimit)
+
+        if search:
+            terms = search_terms(params.get('q', ''))
+            matches = [p for p in self.state.posts_by_subreddit.get(search.group(1).lower(), [])
+                       if any(t in (p['title'] + ' ' + p['selftext']).lower() for t in terms)]
+            return self._send_json(self._page(matches, params), ratelimit=ratelimit)
+        if new_listing:
+            posts = self.state.posts_by_subreddit.get(new_listing.group(1).lower(), [])
+            return self._send_json(self._page(posts, params), ratelimit=ratelimit)
+        if comments:
+            post = self.state.posts_by_id.get(comments.group(1))
+            if post is None:
+                return self._send_json({'message': 'Not Found', 'error': 404}, status=404, ratelimit=ratelimit)
+            shown = post['comments'][:INITIAL_COMMENTS_PER_POST]
+            hidden = post['comments'][INITIAL_COMMENTS_PER_POST:]
+            children = [comment_json(post, c) for c in shown]
+            if hidden:
+                children.append({'kind': 'more', 'data': {
+                    'count': len(hidden), 'name': f"t1_{hidden[0]['id']}", 'id': hidden[0]['id'],
+                    'parent_id': f"t3_{post['id']}", 'depth': 0, 'children': [c['id'] for c in hidden]}})
+            return self._send_json([listing_json([submission_json(post)]), listing_json(children)],
+                                   ratelimit=ratelimit)
+        # /api/morechildren
+        things = []
+        for comment_id in params.get('children', '').split(','):
+            if comment_id in self.state.comments_by_id:
+                post, comment = self.state.comments_by_id[comment_id]
+                things.append(comment_json(post, comment))
+        return self._send_json({'json': {'errors': [], 'data': {'things': things}}}, ratelimit=ratelimit)
+
+    @staticmethod
+    def _page(posts, params):
+        """Slices a newest-first post list into a Listing page honouring limit/after."""
+        limit = min(int(params.get('limit') or 25), MAX_LISTING_LIMIT)
+        start = 0
+        after = params.get('after')
+        if after:
+            ids = [f"t3_{p['id']}" for p in posts]
+            start = ids.index(after) + 1 if after in ids else len(posts)
+        page = posts[start:start + limit]
+        next_after = f"t3_{page[-1]['id']}" if page and start + limit < len(posts) else None
+        return listing_json([submission_json(p) for p in page], after=next_after)
+
+
+def make_server(state, host='127.0.0.1', port=DEFAULT_PORT):
+    handler = type('BoundFakeRedditHandler', (FakeRedditHandler,), {'state': state})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_background_server(state, host='127.0.0.1', port=0):
+    """Starts the stand-in on a daemon thread; port=0 picks a free port. Returns (server, base_url)."""
+    server = make_server(state, host, port)
+    thread = threading.Thread(target=server.serve_forever, name='fake-reddit', daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def load_player_names(file_path=PLAYER_NICKNAMES_FILE):
+    with open(file_path, 'r') as f:
+        return [entry['name'] for entry in json.load(f) if entry.get('name')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local Reddit API stand-in for fetcher benchmarks.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--synthetic-days', type=int, default=0,
+                        help="Serve synthetic posts for this many days instead of the recorded mentions")
+    parser.add_argument('--synthetic-start', default='2024-10-22', help="First synthetic day (YYYY-MM-DD)")
+    parser.add_argument('--latency-ms', type=float, nargs=2, default=[20, 80], metavar=('MIN', 'MAX'))
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of API calls answered with 429")
+    parser.add_argument('--budget', type=int, default=RATELIMIT_BUDGET, help="Requests per rate-limit window")
+    args = parser.parse_args()
+
+    if args.synthetic_days:
+        start = datetime.strptime(args.synthetic_start, '%Y-%m-%d').date()
+        corpus = generate_synthetic_posts(load_player_names(), ['nba', 'nbadiscussion', 'lakers'], start, args.synthetic_days)
+    else:
+        corpus = load_recorded_posts()
+    fake_state = FakeRedditState(corpus, budget=args.budget, latency_ms=tuple(args.latency_ms), error_rate=args.error_rate)
+    httpd = make_server(fake_state, port=args.port)
+    print(f"Serving {len(corpus)} posts on http://127.0.0.1:{args.port} (stats at /__stats)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(fake_state.stats(), indent=2))
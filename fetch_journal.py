@@ -0,0 +1,120 @@
+# fetch_journal.py
+
+import json
+import logging
+import os
+import threading
+
+
+def unit_key(player_name, game_date_str, subreddit_name):
+    return (player_name, game_date_str, subreddit_name)
+
+
+class JournalMismatchError(ValueError):
+    """The journal on disk was written by a run with different parameters."""
+
+
+class FetchJournal:
+    """
+    Append-only JSON-lines journal of completed (player, game_date, subreddit) fetch units.
+
+    Each line holds one unit with the mention and comment rows it produced, flushed and fsync'd as soon
+    as the unit finishes, so a crash loses at most the units that were still in flight.
+    With resume=True an existing journal is replayed first; otherwise it is started fresh.
+    Replay only indexes line offsets, so the journaled rows stay on disk until they're needed.
+
+    The first line is a header with the parameters of the run that wrote the journal (`header`,
+    any JSON-able dict); resuming with different parameters raises JournalMismatchError. After a
+    clean run, finish() renames the journal to <journal>.done so it can't be replayed again.
+    """
+
+    def __init__(self, journal_path, resume=False, header=None):
+        self.journal_path = journal_path
+        self.header = json.loads(json.dumps(header or {})) # As it reads back from disk (tuples -> lists)
+        self.completed = {} # unit key -> byte offset of its journal line
+        journal_dir = os.path.dirname(journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+        if resume and os.path.exists(journal_path):
+            stored_header = self.read_header(journal_path)
+            if stored_header != self.header:
+                raise JournalMismatchError(
+                    f"{journal_path} was written by a different run ({stored_header}); not resuming it with {self.header}")
+            self._replay()
+            mode = 'a'
+        else:
+            mode = 'w'
+        self._lock = threading.Lock()
+        self._file = open(journal_path, mode, encoding='utf-8')
+        if mode == 'w':
+            self._file.write(json.dumps({'journal_header': self.header}, ensure_ascii=False) + '\n')
+            self._file.flush()
+        elif self._ends_mid_line():
+            self._file.write('\n') # Keep the crash-truncated line from swallowing the next record
+
+    @staticmethod
+    def read_header(journal_path):
+        """The run parameters a journal was written with, or None if it has no header line (or doesn't exist)."""
+        try:
+            with open(journal_path, 'rb') as f:
+                return json.loads(f.readline().decode('utf-8')).get('journal_header')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _replay(self):
+        bad_lines = 0
+        with open(self.journal_path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                    if 'journal_header' in entry:
+                        offset += len(line)
+                        continue
+                    key = unit_key(entry['player'], entry['game_date'], entry['subreddit'])
+                    self.completed[key] = offset
+                except (ValueError, KeyError):
+                    bad_lines += 1 # Typically the last line, cut off by the crash
+                offset += len(line)
+        if bad_lines:
+            logging.warning(f"Ignored {bad_lines} unreadable line(s) in {self.journal_path}")
+        logging.info(f"Replayed {len(self.completed)} completed units from {self.journal_path}")
+
+    def _ends_mid_line(self):
+        with open(self.journal_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def get_unit(self, key):
+        """Returns (rows, comment_rows) for a completed unit."""
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self.completed[key])
+            entry = json.loads(f.readline().decode('utf-8'))
+        return entry['rows'], entry.get('comments', [])
+
+    def record(self, key, rows, comment_rows=()):
+        """Appends a completed unit and forces it to disk."""
+        player_name, game_date_str, subreddit_name = key
+        line = json.dumps({'player': player_name, 'game_date': game_date_str, 'subreddit': subreddit_name,
+                           'rows': rows, 'comments': list(comment_rows)}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def finish(self):
+        """Closes the journal of a completed run and moves it aside to <journal>.done."""
+        self.close()
+        done_path = self.journal_path + '.done'
+        os.replace(self.journal_path, done_path)
+        logging.info(f"Run complete; journal moved to {done_path}")
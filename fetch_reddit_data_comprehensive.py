@@ -6,17 +6,42 @@ import os
 import json
 import time
 import logging
-from datetime import datetime, timedelta
-from readPL import read_player_list
+import argparse
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import islice
+from datetime import datetime, timedelta, time as dt_time
+from reddit_store import RedditPostStore
+from reddit_rate_limiter import TokenBucketRateLimiter
+from fetch_journal import FetchJournal, JournalMismatchError, unit_key
+from nickname_matcher import load_nickname_matcher
+from player_names import name_key, name_keys, player_file_slug, read_player_list
+from comment_scheduler import CommentExpansionScheduler, expansion_value
+from fetch_telemetry import FetchTelemetry, TelemetryRequestor, instrument_prawcore_pacing
+from mentions_io import (TableWriter, mentions_file_path, comments_file_path, export_parquet_to_csv,
+                         parquet_available, find_table_file, table_columns, iter_table_dicts, read_table,
+                         MENTION_COLUMNS, POST_COLUMNS, COMMENT_COLUMNS, COMMENTS_SAMPLE_SEPARATOR)
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
 REDDIT_CLIENT_ID = 'E2MfNNRsw6F5YfvVoc8Jtg' 
 REDDIT_CLIENT_SECRET = 'Ns86Hi0A_jcWH2TwzWE5JBGsXZKBLw' 
 REDDIT_USER_AGENT = 'NBA Sent Gatherer by /u/Long-Place-9308' 
+# Set to e.g. http://127.0.0.1:8765 to run against fake_reddit_server.py instead of reddit.com
+REDDIT_API_BASE_URL = os.environ.get('REDDIT_API_BASE_URL')
 
 PLAYER_STATS_BASE_DIR = 'data/new/player_stats'
 PLAYER_NICKNAMES_FILE = 'data/json/nicknames.json' # Ensure this file exists and is correct!
 REDDIT_OUTPUT_DIR = 'data/new/reddit_data'
+REDDIT_STORE_FILE = os.path.join(REDDIT_OUTPUT_DIR, 'reddit_post_store.sqlite3') # Posts + fetched comments, reused across runs
+REDDIT_OUTPUT_FORMAT = 'parquet' if parquet_available() else 'csv' # Mentions are streamed to disk as they arrive
+# Comments go to *_reddit_comments.{parquet,csv}; set True to also keep the old ' || '-joined column
+INCLUDE_COMMENTS_SAMPLE_BLOB = False
+FETCH_JOURNAL_FILE = os.path.join(REDDIT_OUTPUT_DIR, 'fetch_journal.jsonl') # Completed units, replayed by --resume
+# Per-run API call latency/bytes/rate-limit report; point the .prom file at node_exporter's textfile directory
+FETCH_TELEMETRY_JSON_FILE = os.path.join(REDDIT_OUTPUT_DIR, 'fetch_telemetry.json')
+FETCH_TELEMETRY_PROM_FILE = os.path.join(REDDIT_OUTPUT_DIR, 'fetch_telemetry.prom')
 
 PLAYER_TEAM_SUBREDDITS = {
     "LeBron James": "lakers",
@@ -29,11 +54,31 @@ PLAYER_TEAM_SUBREDDITS = {
     "Donovan Mitchell": "clevelandcavs"
 }
 GENERAL_SUBREDDITS = ['nba', 'nbadiscussion']
+# --firehose: these listings are paged once per run and every player is matched locally,
+# so their API cost follows subreddit volume instead of the number of players
+FIREHOSE_SUBREDDITS = ['nba', 'nbadiscussion']
+LISTING_PAGE_SIZE = 100 # Reddit's maximum listing page; each page is one API call
 
 POST_SEARCH_LIMIT_PER_QUERY = 75 # Can increase slightly if using OR queries
+# Players searched in the same subreddit share OR-queries up to Reddit's query length limit.
+# Hits are split back per player locally, and the shared query is paged until every player in it
+# has POST_SEARCH_LIMIT_PER_QUERY matched posts; a player it can't fill falls back to their own query
+COALESCE_PLAYER_QUERIES = True
+REDDIT_MAX_QUERY_LENGTH = 512
+REDDIT_SEARCH_RESULT_CAP = 250 # Reddit stops paging a search after about this many results
 COMMENT_LIMIT_PER_POST = 30     # Reduced for speed, adjust if more needed
-MIN_POST_SCORE_FOR_DEEP_COMMENTS = 5 # Only fetch comments for posts with at least this score
+MIN_POST_SCORE_FOR_DEEP_COMMENTS = 5 # Only posts with at least this score may expand beyond the first comment page
 FETCH_DEEP_COMMENTS = True # Set to False for top-level only, much faster
+# replace_more() calls are budgeted and spent on the posts with the highest expected value
+# (score, num_comments, closeness to tip-off); None = unlimited
+COMMENT_EXPANSION_CALLS_PER_RUN = None
+COMMENT_EXPANSION_CALLS_PER_PLAYER = 300
+GAME_TIPOFF_TIME = dt_time(19, 30) # Game logs only carry the date; most games tip off in the evening
+TIPOFF_DECAY_HOURS = 12 # A post this far from tip-off is worth half as much to expand
+REQUIRE_LOCAL_MATCH = True # Drop search hits whose title/body don't name the player before expanding comments
+
+POST_STORE_REFRESH_AFTER_HOURS = 12 # Re-fetch comments of still-active threads after this long
+POST_STORE_SETTLED_AFTER_DAYS = 3   # Comments fetched this long after posting are treated as final
 
 DAYS_BEFORE_GAME = 0
 DAYS_AFTER_GAME = 1
@@ -42,6 +87,14 @@ DAYS_AFTER_GAME = 1
 SMART_SLEEP_TARGET_QPM = 85 # Target QPM (e.g., 85 to stay under 100)
 SMART_SLEEP_DEFAULT_DELAY = 60 / SMART_SLEEP_TARGET_QPM # Calculated base delay
 SMART_SLEEP_RATELIMIT_FLOOR = 10 # If remaining requests hit this, sleep until reset
+SMART_SLEEP_BURST = 5 # Token bucket capacity: calls that may go out back-to-back
+RATELIMIT_WINDOW_SECONDS = 600 # Reddit's rate-limit window
+
+# --- Concurrent fetch engine ---
+FETCH_WORKERS = 4 # (player, search interval, subreddit) jobs fetched in parallel; all share RATE_LIMITER
+# Jobs submitted per worker ahead of the one being written: finished results held in memory stay
+# bounded behind a slow job instead of growing with the number of jobs
+FETCH_JOBS_IN_FLIGHT_PER_WORKER = 2
 
 LOG_FILE = "data_acquisition_reddit.log"
 logging.basicConfig(level=logging.INFO,
@@ -49,50 +102,95 @@ logging.basicConfig(level=logging.INFO,
                     handlers=[logging.FileHandler(LOG_FILE),
                               logging.StreamHandler()])
 
+# Search results are identical for every game date (only the date filter changes),
+# so each (subreddit, query) pair is searched once per run and reused.
+SEARCH_RESULTS_CACHE = {} # (subreddit_name, query) -> (sorted created_utc list, post dicts in same order)
+KEY_LOCKS_GUARD = threading.Lock()
+KEY_LOCKS = {} # Per search key / post id, so concurrent jobs don't repeat a search or expand one post twice
+POST_STORE = None # RedditPostStore, opened in __main__; None disables the on-disk store
+FETCH_JOURNAL = None # FetchJournal, opened in __main__; None disables checkpointing
+INCREMENTAL_SINCE = {} # (player, subreddit) -> high-water mark; --incremental only keeps posts newer than it
+FIREHOSE_MODE = False # Set by --firehose
+FIREHOSE_SINCE = None # Oldest created_utc any firehose job needs; listings are paged back to it
+FIREHOSE_LISTINGS = {} # subreddit_name -> (post dicts from /new sorted by created_utc, players each one mentions)
+NICKNAME_MATCHER = None # NicknameMatcher over the tracked players, built in __main__; None disables local matching
+FETCH_TELEMETRY = None # FetchTelemetry, created in __main__; None disables call instrumentation
+SEARCH_GROUPS = {} # (subreddit_name, player) -> (coalesced OR-query, players in it), from plan_search_groups()
+
+# Reddit's budget is per OAuth client, so every worker draws from one bucket.
+# Starts at the target QPM until the first response headers re-size it.
+RATE_LIMITER = TokenBucketRateLimiter(rate=SMART_SLEEP_TARGET_QPM / 60,
+                                      capacity=SMART_SLEEP_BURST,
+                                      floor=SMART_SLEEP_RATELIMIT_FLOOR)
+COMMENT_SCHEDULER = CommentExpansionScheduler(calls_per_run=COMMENT_EXPANSION_CALLS_PER_RUN,
+                                              calls_per_player=COMMENT_EXPANSION_CALLS_PER_PLAYER)
+_worker_state = threading.local()
+
 # --- Helper Functions ---
 def initialize_reddit_client():
     # ... (same as before, ensure credentials are real) ...
+    endpoint_overrides = {}
+    if REDDIT_API_BASE_URL:
+        endpoint_overrides = {'oauth_url': REDDIT_API_BASE_URL, 'reddit_url': REDDIT_API_BASE_URL}
+    if FETCH_TELEMETRY is not None: # Times every HTTP call the client makes
+        endpoint_overrides.update(requestor_class=TelemetryRequestor, requestor_kwargs={'telemetry': FETCH_TELEMETRY})
     try:
         reddit = praw.Reddit(
             client_id=REDDIT_CLIENT_ID,
             client_secret=REDDIT_CLIENT_SECRET,
             user_agent=REDDIT_USER_AGENT,
-            check_for_async=False
+            check_for_async=False,
+            **endpoint_overrides
         )
         reddit.read_only = True
+        if FETCH_TELEMETRY is not None:
+            instrument_prawcore_pacing(reddit, FETCH_TELEMETRY)
         logging.info(f"PRAW Reddit client initialized. Read-only: {reddit.read_only}")
         return reddit
     except Exception as e:
         logging.error(f"Failed to initialize PRAW Reddit client: {e}")
         return None
 
-def smart_sleep_and_log(reddit_client, context="api_call"):
-    """Uses X-Ratelimit headers to sleep smartly and logs them."""
-    # Accessing the last response requires a bit of care with PRAW versions
-    # For PRAW 7.x, it's usually on reddit_client._core._last_response
-    last_response = getattr(getattr(reddit_client, '_core', None), '_last_response', None)
-    
-    if last_response and hasattr(last_response, 'headers'):
+def read_ratelimit_headers(reddit_client):
+    """Returns (used, remaining, reset_in_seconds) from the client's last response, or None."""
+    core = getattr(reddit_client, '_core', None)
+    # Some PRAW versions keep the last response on reddit_client._core._last_response
+    last_response = getattr(core, '_last_response', None)
+    if last_response is not None and hasattr(last_response, 'headers'):
         headers = last_response.headers
-        used = headers.get("x-ratelimit-used", "N/A")
-        remaining = headers.get("x-ratelimit-remaining", "N/A")
-        reset_in_seconds = headers.get("x-ratelimit-reset", "N/A")
-        logging.debug(f"Ratelimit after {context}: Used={used}, Remaining={remaining}, ResetIn={reset_in_seconds}s")
-
-        try:
-            remaining_float = float(remaining)
-            reset_in_float = float(reset_in_seconds)
-            if remaining_float <= SMART_SLEEP_RATELIMIT_FLOOR:
-                sleep_duration = reset_in_float + 1 # Sleep until reset + 1s buffer
-                logging.warning(f"Rate limit floor hit (Remaining: {remaining_float}). Sleeping for {sleep_duration:.2f}s.")
-                time.sleep(sleep_duration)
-                return
-        except ValueError:
-            logging.debug("Could not parse ratelimit headers for smart sleep.")
-            pass # Fall through to default sleep if headers can't be parsed
-    
-    # Default sleep if headers aren't available or not hitting floor
-    time.sleep(SMART_SLEEP_DEFAULT_DELAY)
+        return (headers.get("x-ratelimit-used", "N/A"),
+                headers.get("x-ratelimit-remaining", "N/A"),
+                headers.get("x-ratelimit-reset", "N/A"))
+    # PRAW 7.x / prawcore 2.x only keep the parsed header values on the session's rate limiter
+    prawcore_limiter = getattr(core, '_rate_limiter', None)
+    if prawcore_limiter is not None and getattr(prawcore_limiter, 'remaining', None) is not None:
+        reset_timestamp = getattr(prawcore_limiter, 'reset_timestamp', None)
+        if reset_timestamp is not None:
+            reset_in_seconds = max(reset_timestamp - time.time(), 0)
+        else: # Reddit's windows are aligned to the clock
+            reset_in_seconds = RATELIMIT_WINDOW_SECONDS - (time.time() % RATELIMIT_WINDOW_SECONDS)
+        return prawcore_limiter.used, prawcore_limiter.remaining, reset_in_seconds
+    return None
+
+def wait_for_api_token(context="api_call"):
+    """Blocks until the shared rate limiter hands out a token for the next API call."""
+    waited = RATE_LIMITER.acquire()
+    if FETCH_TELEMETRY is not None:
+        FETCH_TELEMETRY.record_sleep(waited, 'rate_limit')
+    if waited > 0:
+        logging.debug(f"Waited {waited:.2f}s for a rate-limit token before {context}")
+
+def update_rate_limit_and_log(reddit_client, context="api_call"):
+    """Feeds the X-Ratelimit headers of the last response to the shared rate limiter and logs them."""
+    ratelimit = read_ratelimit_headers(reddit_client)
+    if ratelimit is None:
+        return # Keep refilling at the default rate
+    used, remaining, reset_in_seconds = ratelimit
+    logging.debug(f"Ratelimit after {context}: Used={used}, Remaining={remaining}, ResetIn={reset_in_seconds}s")
+    try:
+        RATE_LIMITER.update_from_headers(float(remaining), float(reset_in_seconds))
+    except (TypeError, ValueError):
+        logging.debug("Could not parse ratelimit headers for the rate limiter.")
 
 
 def load_player_nicknames(file_path):
@@ -112,7 +210,7 @@ def load_player_nicknames(file_path):
             # Escape quotes within terms if any, though unlikely for names
             escaped_terms = [term.replace('"', '\\"') for term in all_terms]
             or_query = " OR ".join([f'"{term}"' for term in escaped_terms]) # "Name1" OR "Nickname2"
-            name_to_queries[canonical_name.lower()] = or_query
+            name_to_queries[name_key(canonical_name)] = or_query
         logging.info(f"Loaded OR-combined nickname queries for {len(name_to_queries)} players.")
         return name_to_queries
     except FileNotFoundError:
@@ -123,12 +221,16 @@ def load_player_nicknames(file_path):
         return {}
 
 
+def player_or_query(name_to_queries, player_name):
+    """The OR-query for a players.txt name, matched on player_names.name_key() ("Luka Dončić" finds "Luka Doncic")."""
+    return next((name_to_queries[key] for key in name_keys(player_name) if key in name_to_queries), None)
+
+
 def get_player_game_dates(player_name_from_list, seasons_to_consider):
     # ... (same as before) ...
     game_dates = set()
-    player_file_slug = player_name_from_list.replace(' ', '_').lower()
     for season_year in seasons_to_consider:
-        stats_file_path = os.path.join(PLAYER_STATS_BASE_DIR, f"season_{season_year}", f"{player_file_slug}_gamelog.csv")
+        stats_file_path = os.path.join(PLAYER_STATS_BASE_DIR, f"season_{season_year}", f"{player_file_slug(player_name_from_list)}_gamelog.csv")
         if os.path.exists(stats_file_path):
             try:
                 df = pd.read_csv(stats_file_path)
@@ -143,93 +245,626 @@ def get_player_game_dates(player_name_from_list, seasons_to_consider):
     logging.info(f"Found {len(sorted_dates)} unique game dates for {player_name_from_list}")
     return sorted_dates
 
-def fetch_reddit_mentions(reddit_client, player_name_canonical, or_combined_query, game_date, team_subreddit=None):
-    collected_posts_data = []
-    start_search_dt = datetime.combine(game_date, datetime.min.time()) - timedelta(days=DAYS_BEFORE_GAME)
-    end_search_dt = datetime.combine(game_date, datetime.max.time()) + timedelta(days=DAYS_AFTER_GAME)
+def get_key_lock(key):
+    """Returns the lock guarding one search-cache key or post id, creating it on first use."""
+    with KEY_LOCKS_GUARD:
+        return KEY_LOCKS.setdefault(key, threading.Lock())
+
+def fetch_listing_pages(reddit_client, fetch_page, max_items=None, stop_before=None, stop_when=None, context="listing"):
+    """
+    Pages a newest-first listing LISTING_PAGE_SIZE posts per API call, taking a rate-limit token per page.
+    fetch_page(limit, params) returns one page. Stops at the end of the listing, after max_items posts,
+    at the first page reaching posts created before stop_before, or once stop_when(page) is true.
+    Returns (posts, stopped), stopped being True when stop_before or stop_when ended the paging.
+    """
+    posts = []
+    after = None
+    while True:
+        page_size = LISTING_PAGE_SIZE if max_items is None else min(LISTING_PAGE_SIZE, max_items - len(posts))
+        wait_for_api_token(context=f"{context} page {len(posts) // LISTING_PAGE_SIZE + 1}")
+        page = list(fetch_page(page_size, {'after': after} if after else {}))
+        update_rate_limit_and_log(reddit_client, context=context)
+        posts.extend(page)
+        if stop_before is not None and page and page[-1].created_utc < stop_before:
+            return posts, True
+        if stop_when is not None and stop_when(page):
+            return posts, True
+        if len(page) < page_size or (max_items is not None and len(posts) >= max_items):
+            return posts, False
+        after = page[-1].fullname
+
+def search_post_record(submission):
+    """
+    The fields of a search/listing hit the fetcher uses, as a plain dict. Cached hits keep no
+    PRAW objects alive: no comment forests, and no link to the worker client that searched.
+    """
+    return {
+        'id': submission.id,
+        'created_utc': submission.created_utc,
+        'title': submission.title,
+        'selftext': submission.selftext,
+        'score': submission.score,
+        'num_comments': submission.num_comments,
+        'permalink': submission.permalink,
+        'subreddit': str(submission.subreddit),
+    }
+
+def get_cached_search_results(reddit_client, subreddit_name, or_combined_query, limit=POST_SEARCH_LIMIT_PER_QUERY):
+    """
+    Returns (timestamps, posts) for a subreddit search, running the search only once per run.
+    Posts are sorted by created_utc so callers can slice a date window with bisect.
+    """
+    cache_key = (subreddit_name.lower(), or_combined_query)
+    with get_key_lock(cache_key):
+        if cache_key in SEARCH_RESULTS_CACHE:
+            logging.debug(f"Search cache hit for r/{subreddit_name}")
+            return SEARCH_RESULTS_CACHE[cache_key]
+
+        subreddit = reddit_client.subreddit(subreddit_name)
+        posts, _ = fetch_listing_pages(
+            reddit_client,
+            lambda page_size, params: subreddit.search(query=or_combined_query, sort='new', limit=page_size, params=params),
+            max_items=limit, context=f"search r/{subreddit_name}")
+
+        posts = sorted((search_post_record(p) for p in posts), key=lambda p: p['created_utc'])
+        timestamps = [p['created_utc'] for p in posts]
+        SEARCH_RESULTS_CACHE[cache_key] = (timestamps, posts)
+    logging.info(f"Cached {len(posts)} search results for r/{subreddit_name}")
+    return timestamps, posts
+
+def plan_search_groups(jobs):
+    """
+    Packs the OR-queries of all players searched in the same subreddit into as few
+    queries as fit REDDIT_MAX_QUERY_LENGTH and records them in SEARCH_GROUPS.
+    Returns the number of searches planned; players a coalesced search can't cover add their own.
+    """
+    queries_by_subreddit = {}
+    for player_name, or_query, _, subreddit_name in jobs:
+        if not uses_firehose(subreddit_name):
+            queries_by_subreddit.setdefault(subreddit_name.lower(), {}).setdefault(player_name, or_query)
+
+    search_count = 0
+    for subreddit_key, queries in queries_by_subreddit.items():
+        groups = []
+        for player_name, or_query in queries.items():
+            if groups and len(groups[-1][1]) + len(" OR ") + len(or_query) <= REDDIT_MAX_QUERY_LENGTH:
+                groups[-1][0].append(player_name)
+                groups[-1][1] = f"{groups[-1][1]} OR {or_query}"
+            else:
+                groups.append([[player_name], or_query])
+        for players, merged_query in groups:
+            if len(players) > 1:
+                for player_name in players:
+                    SEARCH_GROUPS[(subreddit_key, player_name)] = (merged_query, players)
+        search_count += len(groups)
+    logging.info(f"Coalesced player queries: {sum(len(q) for q in queries_by_subreddit.values())} "
+                 f"player searches -> {search_count} searches")
+    return search_count
+
+def get_coalesced_search_results(reddit_client, subreddit_name, merged_query, players):
+    """
+    Runs a coalesced OR-query once per run and splits its hits per player by local matching.
+    Pages newest first until every player has POST_SEARCH_LIMIT_PER_QUERY matched posts (their
+    newest are kept), so busy players can't crowd quieter ones out of the shared results.
+    Returns {player: (timestamps, posts)}. Players left short because Reddit cut the search off
+    at REDDIT_SEARCH_RESULT_CAP are missing: only their own query can reach further back.
+    """
+    cache_key = (subreddit_name.lower(), f"coalesced:{merged_query}")
+    with get_key_lock(cache_key):
+        if cache_key in SEARCH_RESULTS_CACHE:
+            return SEARCH_RESULTS_CACHE[cache_key]
+
+        matched = {player_name: [] for player_name in players}
+        def every_player_filled(page):
+            for submission in page:
+                post = search_post_record(submission)
+                text = post_match_text(post)
+                for player_name, posts in matched.items():
+                    if len(posts) < POST_SEARCH_LIMIT_PER_QUERY and NICKNAME_MATCHER.mentions(text, player_name):
+                        posts.append(post)
+            return all(len(posts) >= POST_SEARCH_LIMIT_PER_QUERY for posts in matched.values())
 
+        subreddit = reddit_client.subreddit(subreddit_name)
+        listing, filled = fetch_listing_pages(
+            reddit_client,
+            lambda page_size, params: subreddit.search(query=merged_query, sort='new', limit=page_size, params=params),
+            max_items=REDDIT_SEARCH_RESULT_CAP, stop_when=every_player_filled,
+            context=f"coalesced search r/{subreddit_name}")
+        cut_off = not filled and len(listing) >= REDDIT_SEARCH_RESULT_CAP
+
+        results = {}
+        for player_name, posts in matched.items():
+            if cut_off and len(posts) < POST_SEARCH_LIMIT_PER_QUERY:
+                continue
+            posts = sorted(posts, key=lambda p: p['created_utc'])
+            results[player_name] = ([p['created_utc'] for p in posts], posts)
+        SEARCH_RESULTS_CACHE[cache_key] = results
+    logging.info(f"Coalesced search in r/{subreddit_name}: {len(listing)} results for {len(players)} players"
+                 + (f", {len(players) - len(results)} left to their own query" if len(results) < len(players) else ""))
+    return results
+
+def get_player_search_results(reddit_client, subreddit_name, player_name_canonical, or_combined_query):
+    """
+    The player's search results and the query that found them. Players sharing a coalesced
+    query get their posts split out of the combined results, unless it ran out before it
+    covered them.
+    """
+    group = SEARCH_GROUPS.get((subreddit_name.lower(), player_name_canonical))
+    if group is not None:
+        merged_query, players = group
+        coalesced = get_coalesced_search_results(reddit_client, subreddit_name, merged_query, players)
+        if player_name_canonical in coalesced:
+            return coalesced[player_name_canonical], merged_query
+    return get_cached_search_results(reddit_client, subreddit_name, or_combined_query), or_combined_query
+
+def get_firehose_listing(reddit_client, subreddit_name):
+    """
+    Pages through r/{subreddit}/new back to FIREHOSE_SINCE, once per run.
+    Returns the posts sorted by created_utc.
+    """
+    cache_key = (subreddit_name.lower(), 'firehose')
+    with get_key_lock(cache_key):
+        if cache_key in FIREHOSE_LISTINGS:
+            return FIREHOSE_LISTINGS[cache_key]
+
+        subreddit = reddit_client.subreddit(subreddit_name)
+        posts, reached_since = fetch_listing_pages(
+            reddit_client, lambda page_size, params: subreddit.new(limit=page_size, params=params),
+            stop_before=FIREHOSE_SINCE, context=f"r/{subreddit_name}/new")
+        if not reached_since and posts:
+            # Reddit stops listings after ~1000 posts, so long backfills still need the search path
+            logging.warning(f"r/{subreddit_name}/new ended at {datetime.fromtimestamp(posts[-1].created_utc)}; "
+                            f"older game dates aren't covered by the firehose.")
+
+        posts = sorted((search_post_record(p) for p in posts if p.created_utc >= FIREHOSE_SINCE),
+                       key=lambda p: p['created_utc'])
+        # One scan per post tags every tracked player it mentions
+        mentioned_players = [NICKNAME_MATCHER.matches(post_match_text(p)) for p in posts]
+        FIREHOSE_LISTINGS[cache_key] = (posts, mentioned_players)
+    logging.info(f"Paged {len(posts)} posts from r/{subreddit_name}/new")
+    return FIREHOSE_LISTINGS[cache_key]
+
+def get_firehose_results(reddit_client, subreddit_name, player_name_canonical):
+    """Like get_cached_search_results(), but matches the player locally in the subreddit's listing."""
+    cache_key = (subreddit_name.lower(), f"firehose:{player_name_canonical}")
+    with get_key_lock(cache_key):
+        if cache_key not in SEARCH_RESULTS_CACHE:
+            listing, mentioned_players = get_firehose_listing(reddit_client, subreddit_name)
+            posts = [post for post, players in zip(listing, mentioned_players) if player_name_canonical in players]
+            SEARCH_RESULTS_CACHE[cache_key] = ([p['created_utc'] for p in posts], posts)
+        return SEARCH_RESULTS_CACHE[cache_key]
+
+def post_match_text(post):
+    return f"{post['title']}\n{post['selftext']}"
+
+def uses_firehose(subreddit_name):
+    return FIREHOSE_MODE and subreddit_name in FIREHOSE_SUBREDDITS
+
+def posts_in_window(search_results, start_dt, end_dt):
+    """Slices cached search results to posts created within [start_dt, end_dt]."""
+    timestamps, posts = search_results
+    lo = bisect_left(timestamps, start_dt.timestamp())
+    hi = bisect_right(timestamps, end_dt.timestamp())
+    return posts[lo:hi]
+
+def is_useful_comment(comment):
+    return bool(comment.body and comment.body.strip()) and comment.body not in ('[deleted]', '[removed]')
+
+def fetch_post_comments(reddit_client, post, deep_comments, player_name=None, value=0.0):
+    """
+    Fetches a post's (a search_post_record() dict) first comment page through this worker's client, then, if deep_comments, expands "load more"
+    stubs one replace_more() call at a time while COMMENT_SCHEDULER grants calls for
+    a post of this value, stopping once COMMENT_LIMIT_PER_POST useful comments exist.
+    Returns (comments, ok, complete); ok is False if fetching failed part-way, complete
+    is False if expansion stopped on the budget with more comments left to load.
+    """
+    comments = []
+    complete = True
+    try:
+        wait_for_api_token(context=f"comments for post {post['id']}")
+        comment_forest = reddit_client.submission(id=post['id']).comments # First access fetches the comment page
+        update_rate_limit_and_log(reddit_client, context=f"comments for post {post['id']}")
+
+        while deep_comments:
+            flat_comments = comment_forest.list()
+            if sum(1 for c in flat_comments if isinstance(c, praw.models.Comment) and is_useful_comment(c)) >= COMMENT_LIMIT_PER_POST:
+                break
+            if not any(isinstance(c, praw.models.MoreComments) for c in flat_comments):
+                break
+            if not COMMENT_SCHEDULER.try_spend(player_name, value):
+                complete = False
+                break
+            wait_for_api_token(context=f"replace_more for post {post['id']}")
+            comment_forest.replace_more(limit=1) # Expands the biggest stub first
+            update_rate_limit_and_log(reddit_client, context=f"replace_more for post {post['id']}")
+        comment_forest.replace_more(limit=0) # Drops the stubs left over; no API call
+
+        for comment in comment_forest.list():
+            if isinstance(comment, praw.models.Comment) and is_useful_comment(comment):
+                comments.append({
+                    'comment_id': comment.id,
+                    'parent_id': comment.parent_id,
+                    'score': comment.score,
+                    'created_utc': comment.created_utc,
+                    'body': comment.body
+                })
+                if len(comments) >= COMMENT_LIMIT_PER_POST:
+                    break
+    except Exception as comment_e:
+        logging.error(f"Error fetching/processing comments for post {post['id']}: {comment_e}")
+        return comments, False, False
+    return comments, True, complete
+
+def post_expansion_value(post, game_date):
+    """Expected value of expanding this post's comments for the given game."""
+    tipoff = datetime.combine(game_date, GAME_TIPOFF_TIME).timestamp()
+    return expansion_value(post['score'], post['num_comments'], (post['created_utc'] - tipoff) / 3600,
+                           decay_hours=TIPOFF_DECAY_HOURS)
+
+def get_post_with_comments(reddit_client, post, player_name=None, game_date=None):
+    """
+    Returns the post record with its comments, served from POST_STORE when the stored
+    copy is fresh. Only new or stale posts go to the API for comment expansion.
+    """
+    # --- QUICK WIN: Only process deep comments for higher score posts ---
+    deep_comments = FETCH_DEEP_COMMENTS and post['score'] >= MIN_POST_SCORE_FOR_DEEP_COMMENTS
+    if FETCH_DEEP_COMMENTS and not deep_comments:
+        logging.debug(f"Skipping deep comments for low-score post (ID: {post['id']}, Score: {post['score']})")
+
+    with get_key_lock(post['id']):
+        return _get_post_with_comments_locked(reddit_client, post, deep_comments, player_name, game_date)
+
+def _get_post_with_comments_locked(reddit_client, post, deep_comments, player_name, game_date):
+    if POST_STORE is not None:
+        stored_post = POST_STORE.get_post(post['id'])
+        if stored_post and POST_STORE.is_fresh(stored_post, deep_comments):
+            logging.debug(f"Post store hit for post {post['id']} ({len(stored_post['comments'])} comments)")
+            return stored_post
+
+    value = post_expansion_value(post, game_date) if game_date is not None else 0.0
+    comments, ok, complete = fetch_post_comments(reddit_client, post, deep_comments, player_name, value)
+    post_record = {
+        'post_id': post['id'],
+        'subreddit': post['subreddit'],
+        'title': post['title'],
+        'body': post['selftext'],
+        'score': post['score'],
+        'num_comments': post['num_comments'],
+        'permalink': post['permalink'],
+        'created_utc': post['created_utc'],
+        'deep_comments': deep_comments and complete, # Cut short by the budget: expand further next run
+        'fetched_at': time.time(),
+        'comments': comments
+    }
+    if ok and POST_STORE is not None: # Don't persist partial comment lists; retry them next run
+        POST_STORE.save_post(post_record)
+    return post_record
+
+def get_subreddits_to_query(team_subreddit=None):
     subreddits_to_query = GENERAL_SUBREDDITS[:]
     if team_subreddit and team_subreddit not in subreddits_to_query:
         subreddits_to_query.append(team_subreddit)
-    
+    return subreddits_to_query
+
+def comment_table_rows(post_id, comments):
+    """Rows for the normalized comments table, linked to the posts table by post_id."""
+    return [{
+        'post_id': post_id,
+        'comment_id': comment['comment_id'],
+        'parent_id': comment['parent_id'],
+        'score': comment['score'],
+        'created_utc': datetime.fromtimestamp(comment['created_utc']).strftime('%Y-%m-%d %H:%M:%S'),
+        'body': comment['body']
+    } for comment in comments]
+
+def game_date_window(game_date):
+    """The (start, end) datetimes of the posts attributed to a game date."""
+    start_search_dt = datetime.combine(game_date, datetime.min.time()) - timedelta(days=DAYS_BEFORE_GAME)
+    end_search_dt = datetime.combine(game_date, datetime.max.time()) + timedelta(days=DAYS_AFTER_GAME)
+    return start_search_dt, end_search_dt
+
+def game_dates_window(game_dates):
+    """The (start, end) datetimes covering a search interval of overlapping game windows."""
+    return game_date_window(game_dates[0])[0], game_date_window(game_dates[-1])[1]
+
+def merge_game_windows(game_dates):
+    """
+    Merges a player's game dates whose post windows overlap (back-to-back games) into
+    disjoint search intervals. Returns a list of sorted tuples of game dates, one per interval.
+    """
+    intervals = []
+    for game_date in sorted(game_dates):
+        if intervals and game_date_window(game_date)[0] <= game_date_window(intervals[-1][-1])[1]:
+            intervals[-1].append(game_date)
+        else:
+            intervals.append([game_date])
+    return [tuple(interval) for interval in intervals]
+
+def attribute_post_to_game(created_utc, game_dates):
+    """
+    The game of an interval a post is about: the last one that tipped off before the post,
+    or the first game whose window contains the post if it came before every tip-off.
+    """
+    containing = [d for d in game_dates
+                  if game_date_window(d)[0].timestamp() <= created_utc <= game_date_window(d)[1].timestamp()]
+    tipped_off = [d for d in containing if datetime.combine(d, GAME_TIPOFF_TIME).timestamp() <= created_utc]
+    return tipped_off[-1] if tipped_off else containing[0]
+
+def interval_label(game_dates):
+    """'2024-01-05', or '2024-01-05..2024-01-06' for a merged interval; used in journal keys and logs."""
+    first, last = game_dates[0].strftime('%Y-%m-%d'), game_dates[-1].strftime('%Y-%m-%d')
+    return first if first == last else f"{first}..{last}"
+
+def post_created_timestamp(post_created_str):
+    """Inverse of the 'post_created_utc' formatting in the mention rows."""
+    return datetime.strptime(post_created_str, '%Y-%m-%d %H:%M:%S').timestamp()
+
+def fetch_subreddit_mentions(reddit_client, player_name_canonical, or_combined_query, game_dates, subreddit_name):
+    """
+    Collects the mention rows for one (player, search interval, subreddit) unit, plus one
+    comments-table row per scraped comment of those posts. game_dates is an interval from
+    merge_game_windows(); each post is fetched once and attributed to one of its games.
+    Returns (rows, comment_rows, ok); ok is False if the search failed, so the unit isn't checkpointed.
+    """
+    collected_posts_data = []
+    collected_comments_data = []
+    start_search_dt, end_search_dt = game_dates_window(game_dates)
+    newer_than = INCREMENTAL_SINCE.get((player_name_canonical, subreddit_name))
+
+    logging.debug(f"Searching r/{subreddit_name} with OR-query for '{player_name_canonical}' around {interval_label(game_dates)}")
+    # The search itself has no date filter, so one cached search per subreddit serves every game date.
+    try:
+        if uses_firehose(subreddit_name):
+            search_results = get_firehose_results(reddit_client, subreddit_name, player_name_canonical)
+            query_used = f"r/{subreddit_name}/new (matched locally)"
+        else:
+            search_results, query_used = get_player_search_results(
+                reddit_client, subreddit_name, player_name_canonical, or_combined_query)
+        window_posts = []
+        for post in posts_in_window(search_results, start_search_dt, end_search_dt):
+            if newer_than is not None and post['created_utc'] <= newer_than:
+                continue # Already in the outputs from an earlier run
+            if (REQUIRE_LOCAL_MATCH and NICKNAME_MATCHER is not None
+                    and not NICKNAME_MATCHER.mentions(post_match_text(post), player_name_canonical)):
+                logging.debug(f"Dropping search hit {post['id']}: no name of {player_name_canonical} in title/body")
+                continue
+            window_posts.append(post)
+
+        post_games = {post['id']: attribute_post_to_game(post['created_utc'], game_dates) for post in window_posts}
+
+        # Expand the most valuable posts first so they get the budget; rows keep chronological order
+        values = {post['id']: post_expansion_value(post, post_games[post['id']]) for post in window_posts}
+        for value in values.values():
+            COMMENT_SCHEDULER.register(value)
+        stored_posts = {}
+        for post in sorted(window_posts, key=lambda p: values[p['id']], reverse=True):
+            stored_posts[post['id']] = get_post_with_comments(reddit_client, post, player_name_canonical, post_games[post['id']])
+
+        for post in window_posts:
+            post_created_dt = datetime.fromtimestamp(post['created_utc'])
+            post_comments = stored_posts[post['id']]['comments']
+
+            post_row = {
+                'player_name_canonical': player_name_canonical,
+                'search_query_used': query_used, # The (coalesced) OR string, or the listing for firehose units
+                'game_date_reference': post_games[post['id']].strftime('%Y-%m-%d'),
+                'subreddit': subreddit_name,
+                'post_id': post['id'],
+                'post_title': post['title'],
+                'post_body': post['selftext'],
+                'post_score': post['score'],
+                'post_num_comments_total': post['num_comments'],
+                'comments_scraped_count': len(post_comments),
+                'post_url': "https://www.reddit.com" + post['permalink'],
+                'post_created_utc': post_created_dt.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            if INCLUDE_COMMENTS_SAMPLE_BLOB:
+                post_row['scraped_comments_sample'] = COMMENTS_SAMPLE_SEPARATOR.join(c['body'] for c in post_comments)
+            collected_posts_data.append(post_row)
+            collected_comments_data.extend(comment_table_rows(post['id'], post_comments))
+
+    except praw.exceptions.PRAWException as pe:
+        logging.error(f"PRAW API error searching r/{subreddit_name} for '{player_name_canonical}': {pe}")
+        time.sleep(SMART_SLEEP_DEFAULT_DELAY * 5) # Longer pause for API errors
+        if FETCH_TELEMETRY is not None:
+            FETCH_TELEMETRY.record_sleep(SMART_SLEEP_DEFAULT_DELAY * 5, 'error_backoff')
+        return collected_posts_data, collected_comments_data, False
+    except Exception as e:
+        logging.error(f"General error searching r/{subreddit_name} for '{player_name_canonical}': {e}")
+        time.sleep(SMART_SLEEP_DEFAULT_DELAY * 3)
+        if FETCH_TELEMETRY is not None:
+            FETCH_TELEMETRY.record_sleep(SMART_SLEEP_DEFAULT_DELAY * 3, 'error_backoff')
+        return collected_posts_data, collected_comments_data, False
+
+    return collected_posts_data, collected_comments_data, True
+
+def fetch_reddit_mentions(reddit_client, player_name_canonical, or_combined_query, game_date, team_subreddit=None):
+    subreddits_to_query = get_subreddits_to_query(team_subreddit)
     logging.debug(f"Effective subreddits for {player_name_canonical}: {subreddits_to_query}")
 
+    collected_posts_data = []
     for subreddit_name in subreddits_to_query:
-        subreddit = reddit_client.subreddit(subreddit_name)
-        logging.debug(f"Searching r/{subreddit_name} with OR-query for '{player_name_canonical}' around {game_date.strftime('%Y-%m-%d')}")
-        # Using the OR-combined query string directly
-        # Adding time_filter if PRAW supports it well with general search, otherwise manual filtering is fine
-        # For now, relying on sort='new' and manual date filtering.
+        rows, _, _ = fetch_subreddit_mentions(
+            reddit_client, player_name_canonical, or_combined_query, (game_date,), subreddit_name)
+        collected_posts_data.extend(rows)
+    return collected_posts_data
+
+# --- Concurrent Fetch Engine ---
+def get_worker_reddit_client():
+    """PRAW clients aren't thread-safe, so each worker thread lazily gets its own."""
+    if getattr(_worker_state, 'reddit', None) is None:
+        _worker_state.reddit = initialize_reddit_client()
+    return _worker_state.reddit
+
+def job_unit_key(job):
+    player_name, _, game_dates, subreddit_name = job
+    return unit_key(player_name, interval_label(game_dates), subreddit_name)
+
+def run_fetch_job(job):
+    """Worker entry point: job is (player_name, or_query, game_dates, subreddit_name), game_dates an interval."""
+    player_name, or_query, game_dates, subreddit_name = job
+    reddit_client = get_worker_reddit_client()
+    if reddit_client is None:
+        logging.error(f"No Reddit client in worker; skipping {player_name} r/{subreddit_name} {interval_label(game_dates)}")
+        return [], []
+    rows, comment_rows, ok = fetch_subreddit_mentions(reddit_client, player_name, or_query, game_dates, subreddit_name)
+    if ok and FETCH_JOURNAL is not None: # Checkpoint as soon as the unit finishes, not when it's consumed
+        FETCH_JOURNAL.record(job_unit_key(job), rows, comment_rows)
+    return rows, comment_rows
+
+def run_fetch_jobs(jobs, workers=FETCH_WORKERS):
+    """
+    Runs (player, search interval, subreddit) jobs on a thread pool, all drawing from RATE_LIMITER.
+    Units already in FETCH_JOURNAL are replayed instead of fetched.
+    Yields (job, (rows, comment_rows)) in the order the jobs were given, so output files match a serial run.
+    At most workers * FETCH_JOBS_IN_FLIGHT_PER_WORKER jobs are submitted ahead of the caller, so only
+    that many results are ever waiting to be consumed.
+    """
+    journal = FETCH_JOURNAL
+    replayed = [journal is not None and journal.is_done(job_unit_key(job)) for job in jobs]
+    pending_jobs = [job for job, done in zip(jobs, replayed) if not done]
+    if len(pending_jobs) < len(jobs):
+        logging.info(f"Resuming: {len(jobs) - len(pending_jobs)} units replayed from the journal, {len(pending_jobs)} to fetch")
+
+    pending_jobs = iter(pending_jobs)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reddit-fetch") as executor:
+        in_flight = deque(executor.submit(run_fetch_job, job)
+                          for job in islice(pending_jobs, workers * FETCH_JOBS_IN_FLIGHT_PER_WORKER))
+        for job, done in zip(jobs, replayed):
+            if done:
+                yield job, journal.get_unit(job_unit_key(job))
+                continue
+            result = in_flight.popleft().result()
+            for next_job in islice(pending_jobs, 1): # Top up before the caller writes this result
+                in_flight.append(executor.submit(run_fetch_job, next_job))
+            yield job, result
+
+def load_high_water_marks(player_name):
+    """
+    Returns {subreddit: newest post created_utc already in the player's outputs}.
+    Outputs written before marks were kept get their marks derived from the posts table once.
+    """
+    marks = POST_STORE.get_high_water_marks(player_name)
+    if marks:
+        return marks
+    existing_posts = find_table_file(mentions_file_path(REDDIT_OUTPUT_DIR, player_name, REDDIT_OUTPUT_FORMAT))
+    if existing_posts is None:
+        return marks
+    columns = ['subreddit', 'post_created_utc']
+    if existing_posts.endswith('.parquet'):
+        posts = read_table(existing_posts, columns=columns)
+    else:
+        posts = read_table(existing_posts, usecols=columns, dtype=str)
+    for subreddit_name, newest in posts.dropna().groupby('subreddit')['post_created_utc'].max().items():
+        marks[subreddit_name] = post_created_timestamp(newest)
+        POST_STORE.update_high_water_mark(player_name, subreddit_name, marks[subreddit_name])
+    logging.info(f"Derived high-water marks for {player_name} from {existing_posts}")
+    return marks
+
+class PlayerOutput:
+    """
+    Streaming posts and comments tables for one player, opened on the first rows.
+    With append=True the player's existing tables are copied in first and units
+    already in them are skipped, so new mentions are added after the stored ones.
+    """
+
+    def __init__(self, player_name, append=False):
+        self.player_name = player_name
+        posts_path = mentions_file_path(REDDIT_OUTPUT_DIR, player_name, REDDIT_OUTPUT_FORMAT)
+        post_columns = MENTION_COLUMNS if INCLUDE_COMMENTS_SAMPLE_BLOB else POST_COLUMNS
+        existing_posts = find_table_file(posts_path) if append else None
+        if existing_posts is not None:
+            post_columns = table_columns(existing_posts) # Keep the layout of the table being appended to
+        self.posts = TableWriter(posts_path, columns=post_columns)
+        self.comments = TableWriter(comments_file_path(posts_path), columns=COMMENT_COLUMNS)
+        self._posts_with_comments = set() # A post seen under several game dates keeps one copy of its comments
+        self._stored_units = set() # (post_id, game_date_reference) already in the existing tables
+        self.newest_created_utc = {} # subreddit -> newest post written, for the high-water marks
+        self.new_rows = 0
+        if existing_posts is not None:
+            self._copy_existing(existing_posts, find_table_file(comments_file_path(posts_path)))
+
+    def _copy_existing(self, posts_path, comments_path):
+        for row in iter_table_dicts(posts_path):
+            self._stored_units.add((str(row['post_id']), str(row['game_date_reference'])))
+            self.posts.write_rows([row])
+        if comments_path is not None:
+            for row in iter_table_dicts(comments_path):
+                self._posts_with_comments.add(str(row['post_id']))
+                self.comments.write_rows([row])
+        logging.info(f"Appending to {len(self._stored_units)} stored mentions of {self.player_name} from {posts_path}")
+
+    def write_unit(self, rows, comment_rows):
+        rows = [row for row in rows if (row['post_id'], row['game_date_reference']) not in self._stored_units]
+        if 'scraped_comments_sample' in self.posts.columns and not INCLUDE_COMMENTS_SAMPLE_BLOB:
+            # Appending to an older table that still carries the joined blob; keep it filled
+            bodies_by_post = {}
+            for comment in comment_rows:
+                bodies_by_post.setdefault(comment['post_id'], []).append(comment['body'])
+            rows = [dict(row, scraped_comments_sample=COMMENTS_SAMPLE_SEPARATOR.join(bodies_by_post.get(row['post_id'], [])))
+                    for row in rows]
+        self.posts.write_rows(rows)
+        self.new_rows += len(rows)
+        for row in rows:
+            created_utc = post_created_timestamp(row['post_created_utc'])
+            if created_utc > self.newest_created_utc.get(row['subreddit'], 0):
+                self.newest_created_utc[row['subreddit']] = created_utc
+        new_comment_rows = [c for c in comment_rows if c['post_id'] not in self._posts_with_comments]
+        self._posts_with_comments.update(row['post_id'] for row in rows)
+        self.comments.write_rows(new_comment_rows)
+
+    def close(self, export_csv=False):
+        """Closes both tables and optionally exports the Parquet tables to CSV."""
         try:
-            # --- SINGLE SEARCH CALL PER SUBREDDIT using OR-combined query ---
-            for post in subreddit.search(query=or_combined_query, sort='new', limit=POST_SEARCH_LIMIT_PER_QUERY):
-                post_created_dt = datetime.fromtimestamp(post.created_utc)
-
-                if start_search_dt <= post_created_dt <= end_search_dt:
-                    # --- QUICK WIN: Only process comments for higher score posts ---
-                    if post.score < MIN_POST_SCORE_FOR_DEEP_COMMENTS and FETCH_DEEP_COMMENTS:
-                        logging.debug(f"Skipping deep comments for low-score post (ID: {post.id}, Score: {post.score})")
-                        comments_to_fetch_limit = 0 # Fetch no comments for low score
-                    elif not FETCH_DEEP_COMMENTS:
-                        comments_to_fetch_limit = 0 # Top-level only mode
-                    else:
-                        comments_to_fetch_limit = None # Try to fetch all, then apply COMMENT_LIMIT_PER_POST
-
-                    all_comments_text = []
-                    if comments_to_fetch_limit is not None or FETCH_DEEP_COMMENTS: # Proceed if we need any comments
-                        try:
-                            # For FETCH_DEEP_COMMENTS = True: limit=None tries for all
-                            # For FETCH_DEEP_COMMENTS = False OR low score: limit=0 for top-level only
-                            post.comments.replace_more(limit= 0 if not FETCH_DEEP_COMMENTS or (post.score < MIN_POST_SCORE_FOR_DEEP_COMMENTS) else None)
-                            smart_sleep_and_log(reddit_client, context=f"replace_more for post {post.id}")
-
-                            comment_count_for_this_post = 0
-                            for comment in post.comments.list():
-                                if isinstance(comment, praw.models.Comment):
-                                    all_comments_text.append(comment.body)
-                                    comment_count_for_this_post += 1
-                                    if comment_count_for_this_post >= COMMENT_LIMIT_PER_POST:
-                                        break
-                        except Exception as comment_e:
-                            logging.error(f"Error fetching/processing comments for post {post.id}: {comment_e}")
-                    
-                    collected_posts_data.append({
-                        'player_name_canonical': player_name_canonical,
-                        'search_query_used': or_combined_query, # This is now the OR string
-                        'game_date_reference': game_date.strftime('%Y-%m-%d'),
-                        'subreddit': subreddit_name,
-                        'post_id': post.id,
-                        'post_title': post.title,
-                        'post_body': post.selftext,
-                        'post_score': post.score,
-                        'post_num_comments_total': post.num_comments,
-                        'comments_scraped_count': len(all_comments_text),
-                        'post_url': "https://www.reddit.com" + post.permalink,
-                        'post_created_utc': post_created_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                        'scraped_comments_sample': " || ".join(all_comments_text)
-                    })
-            # --- Smart sleep after each subreddit.search call ---
-            smart_sleep_and_log(reddit_client, context=f"search r/{subreddit_name}")
-
-        except praw.exceptions.PRAWException as pe:
-            logging.error(f"PRAW API error searching r/{subreddit_name} for '{player_name_canonical}': {pe}")
-            time.sleep(SMART_SLEEP_DEFAULT_DELAY * 5) # Longer pause for API errors
+            rows_written = self.posts.close()
+            comments_written = self.comments.close()
+            logging.info(f"✅ Saved {rows_written} Reddit mentions ({self.new_rows} new) for {self.player_name} to {self.posts.path} "
+                         f"({comments_written} comments in {self.comments.path})")
+            if POST_STORE is not None: # Only once the rows are safely on disk
+                for subreddit_name, created_utc in self.newest_created_utc.items():
+                    POST_STORE.update_high_water_mark(self.player_name, subreddit_name, created_utc)
+            if export_csv and self.posts.path.endswith('.parquet'):
+                for table_path in (self.posts.path, self.comments.path):
+                    csv_path = export_parquet_to_csv(table_path)
+                    logging.info(f"Exported {table_path} to {csv_path}")
         except Exception as e:
-            logging.error(f"General error searching r/{subreddit_name} for '{player_name_canonical}': {e}")
-            time.sleep(SMART_SLEEP_DEFAULT_DELAY * 3)
-            
-    return collected_posts_data
+            logging.error(f"Error saving mentions for {self.player_name}: {e}")
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch Reddit mentions around each player's game dates.")
+    parser.add_argument('--workers', type=int, default=FETCH_WORKERS,
+                        help=f"Concurrent fetch jobs sharing one rate limiter (default: {FETCH_WORKERS})")
+    parser.add_argument('--export-csv', action='store_true',
+                        help="Also export each player's Parquet tables to *_reddit_mentions.csv / *_reddit_comments.csv")
+    parser.add_argument('--resume', action='store_true',
+                        help=f"Replay {FETCH_JOURNAL_FILE} and only fetch the units it doesn't have "
+                             "(refused if it was written with different run parameters)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch posts newer than each player's per-subreddit high-water mark "
+                             "and append them to the existing outputs")
+    parser.add_argument('--expansion-calls-per-run', type=int, default=COMMENT_EXPANSION_CALLS_PER_RUN,
+                        help="Budget of replace_more() calls for the whole run (default: unlimited)")
+    parser.add_argument('--expansion-calls-per-player', type=int, default=COMMENT_EXPANSION_CALLS_PER_PLAYER,
+                        help=f"Budget of replace_more() calls per player (default: {COMMENT_EXPANSION_CALLS_PER_PLAYER})")
+    parser.add_argument('--firehose', action='store_true',
+                        help=f"Page r/{', r/'.join(FIREHOSE_SUBREDDITS)} once and match every player locally "
+                             "instead of searching per player")
+    args = parser.parse_args()
+
     os.makedirs(REDDIT_OUTPUT_DIR, exist_ok=True)
     logging.info("Starting Reddit data acquisition process (Optimized)...")
+    FETCH_TELEMETRY = FetchTelemetry()
 
     reddit = initialize_reddit_client()
     if not reddit:
         logging.critical("Reddit client failed to initialize. Exiting.")
         exit()
 
+    POST_STORE = RedditPostStore(REDDIT_STORE_FILE,
+                                 refresh_after_hours=POST_STORE_REFRESH_AFTER_HOURS,
+                                 settled_after_days=POST_STORE_SETTLED_AFTER_DAYS)
+
     target_players_from_file = read_player_list()
     if not target_players_from_file:
         logging.error("No players found in players.txt. Exiting.")
@@ -244,7 +879,7 @@ if __name__ == "__main__":
             # Clean the name and escape any double quotes within the name itself
             cleaned_name = name.strip().replace('"', '\\"') 
             # Construct the query string: "Player Name"
-            player_name_to_or_queries_map[name.lower()] = f'"{cleaned_name}"'
+            player_name_to_or_queries_map[name_key(name)] = f'"{cleaned_name}"'
     
 
     try:
@@ -254,12 +889,33 @@ if __name__ == "__main__":
         logging.warning("Could not import SEASONS_TO_FETCH from newNBAstats.py. Using default.")
         NBA_SEASONS = ["2022", "2023", "2024"] 
 
+    COMMENT_SCHEDULER = CommentExpansionScheduler(calls_per_run=args.expansion_calls_per_run,
+                                                  calls_per_player=args.expansion_calls_per_player)
+    NICKNAME_MATCHER = load_nickname_matcher(PLAYER_NICKNAMES_FILE, target_players_from_file)
+    FIREHOSE_MODE = args.firehose
+
+    # Recorded in the journal header; --resume only replays a journal written with the same ones
+    run_parameters = {
+        'players': target_players_from_file,
+        'seasons': NBA_SEASONS,
+        'days_before_game': DAYS_BEFORE_GAME,
+        'days_after_game': DAYS_AFTER_GAME,
+        'incremental': args.incremental,
+        'firehose': args.firehose,
+        'coalesce': COALESCE_PLAYER_QUERIES,
+        'require_local_match': REQUIRE_LOCAL_MATCH,
+    }
+    # A resumed --incremental run keeps the marks it started with (players it finished have moved theirs on)
+    resumed_header = FetchJournal.read_header(FETCH_JOURNAL_FILE) if args.resume else None
+
     total_players = len(target_players_from_file)
+    jobs = []
+    jobs_per_player = {}
     for player_idx, player_name_in_list in enumerate(target_players_from_file):
-        logging.info(f"--- Processing Player: {player_name_in_list} ({player_idx+1}/{total_players}) ---")
+        logging.info(f"--- Planning Player: {player_name_in_list} ({player_idx+1}/{total_players}) ---")
 
         # Get the OR-combined query string for the player
-        or_query_for_player = player_name_to_or_queries_map.get(player_name_in_list.lower())
+        or_query_for_player = player_or_query(player_name_to_or_queries_map, player_name_in_list)
         if not or_query_for_player: # Should not happen if fallback is created, but as a safeguard
             logging.warning(f"No OR-query found for {player_name_in_list}. Using canonical name only.")
             temp_cleaned_name_for_fallback = player_name_in_list.strip().replace('"', '\"')
@@ -278,37 +934,79 @@ if __name__ == "__main__":
             logging.warning(f"No game dates for {player_name_in_list}. Skipping Reddit search.")
             continue
 
-        player_all_mentions_data = []
-        total_game_dates = len(game_dates)
-        for i, game_dt_obj in enumerate(game_dates):
-            logging.info(f"Fetching mentions for {player_name_in_list} around game {game_dt_obj.strftime('%Y-%m-%d')} ({i+1}/{total_game_dates})")
-            
-            mentions_for_gamedate = fetch_reddit_mentions(
-                reddit, 
-                player_name_in_list, 
-                or_query_for_player, # Pass the single OR-combined query string
-                game_dt_obj,
-                team_subreddit=player_team_sub
-            )
-            
-            if mentions_for_gamedate:
-                player_all_mentions_data.extend(mentions_for_gamedate)
-        
-        # Smart sleep after processing all game dates for a player, before starting next player
-        # This is optional, as sleeps are already within the fetch_reddit_mentions
-        # smart_sleep_and_log(reddit, context="end_of_player_processing")
-
-
-        if player_all_mentions_data:
-            df_player_mentions = pd.DataFrame(player_all_mentions_data)
-            output_filename = os.path.join(REDDIT_OUTPUT_DIR, f"{player_name_in_list.replace(' ', '_').lower()}_reddit_mentions.csv")
-            try:
-                df_player_mentions.to_csv(output_filename, index=False, encoding='utf-8-sig') # utf-8-sig for Excel
-                logging.info(f"✅ Saved {len(df_player_mentions)} Reddit mentions for {player_name_in_list} to {output_filename}")
-            except Exception as e:
-                logging.error(f"Error saving CSV for {player_name_in_list}: {e}")
-
+        if args.incremental and resumed_header is not None:
+            high_water_marks = resumed_header.get('incremental_since', {}).get(player_name_in_list, {})
         else:
-            logging.info(f"No Reddit mentions found for {player_name_in_list} across all game dates.")
+            high_water_marks = load_high_water_marks(player_name_in_list) if args.incremental else {}
+        for subreddit_name, newest_created_utc in high_water_marks.items():
+            INCREMENTAL_SINCE[(player_name_in_list, subreddit_name)] = newest_created_utc
+
+        # Back-to-back games share one search interval, so their posts are fetched once.
+        # Incremental runs skip intervals that closed before the subreddit's mark.
+        search_intervals = merge_game_windows(game_dates)
+        if len(search_intervals) < len(game_dates):
+            logging.info(f"Merged {len(game_dates)} game windows into {len(search_intervals)} search intervals")
+        player_jobs = [(player_name_in_list, or_query_for_player, interval, subreddit_name)
+                       for interval in search_intervals
+                       for subreddit_name in get_subreddits_to_query(player_team_sub)
+                       if game_dates_window(interval)[1].timestamp() > high_water_marks.get(subreddit_name, 0)]
+        if not player_jobs:
+            logging.info(f"No game dates after the high-water marks for {player_name_in_list}. Nothing to fetch.")
+            continue
+        jobs.extend(player_jobs)
+        jobs_per_player[player_name_in_list] = len(player_jobs)
+
+    # Incremental runs only need the listing back to the oldest mark, not to the start of each window
+    firehose_starts = [max(game_dates_window(interval)[0].timestamp(), INCREMENTAL_SINCE.get((player_name, subreddit_name), 0))
+                       for player_name, _, interval, subreddit_name in jobs if uses_firehose(subreddit_name)]
+    if firehose_starts:
+        FIREHOSE_SINCE = min(firehose_starts)
+        logging.info(f"Firehose: paging r/{', r/'.join(FIREHOSE_SUBREDDITS)} back to {datetime.fromtimestamp(FIREHOSE_SINCE)}")
+
+    incremental_since = {}
+    for (player_name, subreddit_name), newest_created_utc in INCREMENTAL_SINCE.items():
+        incremental_since.setdefault(player_name, {})[subreddit_name] = newest_created_utc
+    try:
+        FETCH_JOURNAL = FetchJournal(FETCH_JOURNAL_FILE, resume=args.resume,
+                                     header={'params': run_parameters, 'incremental_since': incremental_since,
+                                             'firehose_since': FIREHOSE_SINCE})
+    except JournalMismatchError as e:
+        logging.critical(f"{e}. Run without --resume to start over.")
+        exit()
 
+    if COALESCE_PLAYER_QUERIES:
+        plan_search_groups(jobs)
+
+    logging.info(f"Fetching {len(jobs)} (player, search interval, subreddit) jobs with {args.workers} workers")
+
+    # Jobs come back in submission order, so each player's rows are contiguous and can be
+    # streamed straight to that player's file without building the whole table in memory
+    player_output = None
+    jobs_done_for_player = 0
+    mentions_saved = 0
+    for (player_name, _, interval, subreddit_name), (mentions_for_unit, comments_for_unit) in run_fetch_jobs(jobs, workers=args.workers):
+        if mentions_for_unit:
+            if player_output is None:
+                player_output = PlayerOutput(player_name, append=args.incremental)
+            player_output.write_unit(mentions_for_unit, comments_for_unit)
+        jobs_done_for_player += 1
+        logging.debug(f"Finished {player_name} {interval_label(interval)} r/{subreddit_name} ({len(mentions_for_unit)} mentions)")
+        if jobs_done_for_player == jobs_per_player[player_name]:
+            if player_output is None:
+                logging.info(f"No {'new ' if args.incremental else ''}Reddit mentions found for {player_name} across all game dates.")
+            else:
+                player_output.close(export_csv=args.export_csv)
+                mentions_saved += player_output.new_rows
+            player_output = None
+            jobs_done_for_player = 0
+
+    COMMENT_SCHEDULER.log_summary()
+    telemetry = FETCH_TELEMETRY.write_reports(FETCH_TELEMETRY_JSON_FILE, FETCH_TELEMETRY_PROM_FILE, mentions_saved=mentions_saved)
+    for call_type, call_stats in telemetry['calls'].items():
+        logging.info(f"{call_type}: {call_stats['count']} calls, p50 {call_stats['latency_p50']:.3f}s, "
+                     f"p95 {call_stats['latency_p95']:.3f}s, {call_stats['bytes_total']} bytes")
+    logging.info(f"API calls per saved mention: {telemetry['calls_per_mention']}; "
+                 f"sleep fraction: {telemetry['sleep_fraction']:.1%} (report: {FETCH_TELEMETRY_JSON_FILE})")
+    FETCH_JOURNAL.finish()
+    POST_STORE.close()
     logging.info("Reddit data acquisition process finished.") 
\ No newline at end of file
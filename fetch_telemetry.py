@@ -0,0 +1,220 @@
+# fetch_telemetry.py
+
+import json
+import math
+import os
+import re
+import threading
+import time
+
+from prawcore import Requestor
+
+# Upper bounds (seconds) of the latency histogram buckets in the Prometheus report
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+METRIC_PREFIX = 'reddit_fetch'
+
+_CALL_TYPES = [
+    (re.compile(r'/api/v1/access_token'), 'auth'),
+    (re.compile(r'/api/morechildren'), 'replace_more'),
+    (re.compile(r'/comments/'), 'comments'),
+    (re.compile(r'/search'), 'search'),
+    (re.compile(r'/(new|hot|top|rising)/?$'), 'listing'),
+]
+
+
+def call_type_for_url(url):
+    """Classifies a Reddit API URL: search, comments (first comment page), replace_more, listing, auth."""
+    path = url.split('?', 1)[0]
+    for pattern, call_type in _CALL_TYPES:
+        if pattern.search(path):
+            return call_type
+    return 'other'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _parse_header(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FetchTelemetry:
+    """
+    Thread-safe record of one fetch run: every HTTP call PRAW makes (type, latency,
+    response bytes, status, X-Ratelimit headers) and every sleep the fetcher takes.
+    write_reports() turns it into a JSON summary and a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.calls = [] # (call_type, started_at, latency_seconds, response_bytes, status)
+        self.ratelimit_timeline = [] # (timestamp, used, remaining, reset_in_seconds)
+        self.sleep_seconds = {} # reason -> seconds
+        self._lock = threading.Lock()
+
+    def record_call(self, call_type, started_at, latency, response_bytes, status, headers=None):
+        with self._lock:
+            self.calls.append((call_type, started_at, latency, response_bytes, status))
+            if headers is not None and 'x-ratelimit-remaining' in headers:
+                self.ratelimit_timeline.append((started_at + latency,
+                                                _parse_header(headers.get('x-ratelimit-used')),
+                                                _parse_header(headers.get('x-ratelimit-remaining')),
+                                                _parse_header(headers.get('x-ratelimit-reset'))))
+
+    def record_sleep(self, seconds, reason):
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.sleep_seconds[reason] = self.sleep_seconds.get(reason, 0.0) + seconds
+
+    def summary(self, mentions_saved=None):
+        with self._lock:
+            calls = list(self.calls)
+            sleep_seconds = dict(self.sleep_seconds)
+            timeline = list(self.ratelimit_timeline)
+        by_type = {}
+        for call_type, _, latency, response_bytes, status in calls:
+            by_type.setdefault(call_type, []).append((latency, response_bytes, status))
+
+        call_stats = {}
+        for call_type, entries in sorted(by_type.items()):
+            latencies = sorted(latency for latency, _, _ in entries)
+            call_stats[call_type] = {
+                'count': len(entries),
+                'errors': sum(1 for _, _, status in entries if status is None or status >= 400),
+                'latency_p50': percentile(latencies, 0.50),
+                'latency_p95': percentile(latencies, 0.95),
+                'latency_max': latencies[-1],
+                'latency_total': sum(latencies),
+                'bytes_total': sum(response_bytes for _, response_bytes, _ in entries),
+            }
+        api_calls = sum(stats['count'] for call_type, stats in call_stats.items() if call_type != 'auth')
+        work_seconds = sum(latency for _, _, latency, _, _ in calls)
+        total_sleep = sum(sleep_seconds.values())
+        return {
+            'run_seconds': time.time() - self.started_at,
+            'api_calls': api_calls,
+            'calls': call_stats,
+            'work_seconds': work_seconds,
+            'sleep_seconds': sleep_seconds,
+            'sleep_fraction': total_sleep / (total_sleep + work_seconds) if total_sleep + work_seconds else 0.0,
+            'mentions_saved': mentions_saved,
+            'calls_per_mention': api_calls / mentions_saved if mentions_saved else None,
+            'ratelimit_timeline': [{'time': t, 'used': used, 'remaining': remaining, 'reset_in': reset_in}
+                                   for t, used, remaining, reset_in in timeline],
+        }
+
+    def prometheus_text(self, summary):
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}' if labels else ''
+                lines.append(f"{METRIC_PREFIX}_{name}{label_text} {value}")
+
+        metric('api_calls_total', 'counter', "HTTP calls made to the Reddit API, by call type.",
+               [((('call_type', t),), s['count']) for t, s in summary['calls'].items()])
+        metric('api_errors_total', 'counter', "Reddit API calls that failed or returned HTTP >= 400.",
+               [((('call_type', t),), s['errors']) for t, s in summary['calls'].items()])
+        metric('response_bytes_total', 'counter', "Response body bytes received, by call type.",
+               [((('call_type', t),), s['bytes_total']) for t, s in summary['calls'].items()])
+
+        with self._lock:
+            calls = list(self.calls)
+        histogram = []
+        for call_type in summary['calls']:
+            latencies = [latency for t, _, latency, _, _ in calls if t == call_type]
+            for bound in LATENCY_BUCKETS:
+                histogram.append(((('call_type', call_type), ('le', bound)), sum(1 for x in latencies if x <= bound)))
+            histogram.append(((('call_type', call_type), ('le', '+Inf')), len(latencies)))
+        lines.append(f"# HELP {METRIC_PREFIX}_api_call_latency_seconds Latency of Reddit API calls.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_api_call_latency_seconds histogram")
+        for labels, value in histogram:
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{METRIC_PREFIX}_api_call_latency_seconds_bucket{{{label_text}}} {value}")
+        for call_type, stats in summary['calls'].items():
+            lines.append(f'{METRIC_PREFIX}_api_call_latency_seconds_sum{{call_type="{call_type}"}} {stats["latency_total"]}')
+            lines.append(f'{METRIC_PREFIX}_api_call_latency_seconds_count{{call_type="{call_type}"}} {stats["count"]}')
+
+        metric('sleep_seconds_total', 'counter', "Seconds workers spent sleeping instead of calling the API, by reason.",
+               [((('reason', r),), s) for r, s in summary['sleep_seconds'].items()])
+        metric('work_seconds_total', 'counter', "Seconds spent inside Reddit API calls.", [((), summary['work_seconds'])])
+        metric('sleep_fraction', 'gauge', "Share of sleep in sleep + API time; near 1 means sleep-bound.",
+               [((), summary['sleep_fraction'])])
+        metric('run_duration_seconds', 'gauge', "Wall time of the fetch run.", [((), summary['run_seconds'])])
+        if summary['mentions_saved'] is not None:
+            metric('mentions_saved', 'gauge', "Mention rows written by the run.", [((), summary['mentions_saved'])])
+        if summary['calls_per_mention'] is not None:
+            metric('api_calls_per_mention', 'gauge', "API calls (excluding auth) per saved mention.",
+                   [((), summary['calls_per_mention'])])
+        if summary['ratelimit_timeline']:
+            metric('ratelimit_remaining', 'gauge', "x-ratelimit-remaining of the last response.",
+                   [((), summary['ratelimit_timeline'][-1]['remaining'])])
+        metric('last_run_timestamp_seconds', 'gauge', "When this report was written.", [((), time.time())])
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, json_path, prometheus_path=None, mentions_saved=None):
+        """Writes the JSON summary (with the rate-limit timeline) and, optionally, a Prometheus textfile."""
+        summary = self.summary(mentions_saved)
+        reports = [(json_path, json.dumps(summary, indent=2))]
+        if prometheus_path:
+            reports.append((prometheus_path, self.prometheus_text(summary)))
+        for path, text in reports:
+            tmp_path = path + '.tmp' # node_exporter may read the textfile at any moment
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        return summary
+
+
+def instrument_prawcore_pacing(reddit_client, telemetry):
+    """
+    prawcore spreads requests over the rate-limit window by sleeping in its RateLimiter
+    before they reach the requestor; counts that time as sleep too.
+    """
+    limiter = getattr(getattr(reddit_client, '_core', None), '_rate_limiter', None)
+    if limiter is None or not hasattr(limiter, 'delay'):
+        return
+    original_delay = limiter.delay
+
+    def timed_delay(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_delay(*args, **kwargs)
+        finally:
+            telemetry.record_sleep(time.perf_counter() - start, 'prawcore_pacing')
+
+    limiter.delay = timed_delay
+
+
+class TelemetryRequestor(Requestor):
+    """prawcore Requestor that times every HTTP call and hands it to a FetchTelemetry."""
+
+    def __init__(self, *args, telemetry=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = telemetry
+
+    def request(self, *args, **kwargs):
+        if self.telemetry is None:
+            return super().request(*args, **kwargs)
+        url = str(args[1] if len(args) > 1 else kwargs.get('url', ''))
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = super().request(*args, **kwargs)
+        except Exception:
+            self.telemetry.record_call(call_type_for_url(url), started_at, time.perf_counter() - start, 0, None)
+            raise
+        self.telemetry.record_call(call_type_for_url(url), started_at, time.perf_counter() - start,
+                                   len(response.content or b''), response.status_code, response.headers)
+        return response
@@ -0,0 +1,246 @@
+# mentions_io.py
+
+import csv
+import os
+
+import pandas as pd
+
+from player_names import player_file_slug
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet output is optional; fall back to streaming CSV
+    pa = None
+    pq = None
+
+MENTION_COLUMNS = [
+    'player_name_canonical', 'search_query_used', 'game_date_reference', 'subreddit',
+    'post_id', 'post_title', 'post_body', 'post_score', 'post_num_comments_total',
+    'comments_scraped_count', 'post_url', 'post_created_utc', 'scraped_comments_sample'
+]
+# Posts table without the ' || '-joined comments blob; comments live in their own table
+POST_COLUMNS = [col for col in MENTION_COLUMNS if col != 'scraped_comments_sample']
+COMMENT_COLUMNS = ['post_id', 'comment_id', 'parent_id', 'score', 'created_utc', 'body']
+COMMENTS_SAMPLE_SEPARATOR = " || "
+INTEGER_COLUMNS = {'post_score', 'post_num_comments_total', 'comments_scraped_count', 'score'}
+
+ROW_GROUP_SIZE = 500 # Rows buffered before a Parquet row group is flushed
+CSV_ENCODING = 'utf-8-sig' # utf-8-sig for Excel
+
+
+def parquet_available():
+    return pq is not None
+
+
+def mentions_file_path(output_dir, player_name, file_format='parquet'):
+    return os.path.join(output_dir, f"{player_file_slug(player_name)}_reddit_mentions.{file_format}")
+
+
+def comments_file_path(mentions_path):
+    """The comments table that sits next to a *_reddit_mentions.{csv,parquet} posts table."""
+    directory, filename = os.path.split(str(mentions_path))
+    return os.path.join(directory, filename.replace('_reddit_mentions', '_reddit_comments', 1))
+
+
+def find_comments_file(mentions_path):
+    """Returns the comments table for a posts table (Parquet preferred), or None if there isn't one."""
+    stem = os.path.splitext(comments_file_path(mentions_path))[0]
+    for ext in ('.parquet', '.csv'):
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return None
+
+
+def _arrow_schema(columns):
+    return pa.schema([(col, pa.int64() if col in INTEGER_COLUMNS else pa.string()) for col in columns])
+
+
+class TableWriter:
+    """
+    Streams rows (dicts) of a mentions or comments table to disk as they arrive instead
+    of holding a player's whole scrape in memory. Writes row-group-batched Parquet when
+    pyarrow is installed, CSV otherwise (chosen by the file extension). Output goes to a temp file that replaces
+    `path` on close(), so an interrupted run never leaves a half-written table behind.
+    """
+
+    def __init__(self, path, columns=MENTION_COLUMNS, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.columns = list(columns)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._tmp_path = path + '.tmp'
+        self._buffer = []
+        self._is_parquet = path.endswith('.parquet')
+        if self._is_parquet:
+            if not parquet_available():
+                raise ImportError("pyarrow is required to write Parquet tables")
+            self._schema = _arrow_schema(self.columns)
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression='zstd')
+        else:
+            self._file = open(self._tmp_path, 'w', newline='', encoding=CSV_ENCODING)
+            self._writer = csv.writer(self._file, lineterminator=os.linesep)
+            self._writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._is_parquet:
+            table = pa.Table.from_pylist([{col: row.get(col) for col in self.columns} for row in self._buffer],
+                                         schema=self._schema)
+            self._writer.write_table(table)
+        else:
+            self._writer.writerows([['' if row.get(col) is None else row.get(col) for col in self.columns]
+                                    for row in self._buffer])
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        if self._is_parquet:
+            self._writer.close()
+        else:
+            self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.rows_written
+
+    def abort(self):
+        """Discards the partial output and leaves any existing file at `path` untouched."""
+        if self._is_parquet:
+            self._writer.close()
+        else:
+            self._file.close()
+        os.remove(self._tmp_path)
+
+
+def iter_parquet_rows(path, batch_size=ROW_GROUP_SIZE):
+    """Yields the header, then each row as a list of strings, like csv.reader over the CSV export."""
+    parquet_file = pq.ParquetFile(path)
+    yield parquet_file.schema_arrow.names
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for row in zip(*columns):
+            yield ['' if value is None else str(value) for value in row]
+
+
+def iter_mention_rows(path):
+    """Yields the header, then string rows, from a mentions table in CSV or Parquet format."""
+    if path.endswith('.parquet'):
+        yield from iter_parquet_rows(path)
+    else:
+        with open(path, 'r', encoding=CSV_ENCODING) as infile:
+            yield from csv.reader(infile)
+
+
+def table_columns(path):
+    """The column names of a CSV or Parquet table, without reading its rows."""
+    if path.endswith('.parquet'):
+        return pq.ParquetFile(path).schema_arrow.names
+    with open(path, 'r', newline='', encoding=CSV_ENCODING) as infile:
+        return next(csv.reader(infile), [])
+
+
+def iter_table_dicts(path):
+    """
+    Yields each row of a CSV or Parquet table as a dict, batch by batch, so an existing
+    table can be streamed into a TableWriter. Integer columns read from CSV come back as ints.
+    """
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=ROW_GROUP_SIZE):
+            columns = batch.schema.names
+            for values in zip(*(batch.column(i).to_pylist() for i in range(batch.num_columns))):
+                yield dict(zip(columns, values))
+    else:
+        with open(path, 'r', newline='', encoding=CSV_ENCODING) as infile:
+            for row in csv.DictReader(infile):
+                for col in INTEGER_COLUMNS.intersection(row):
+                    row[col] = int(float(row[col])) if row[col] else None
+                yield row
+
+
+def find_table_file(path):
+    """Returns `path` if it exists, else the same table in the other format, else None."""
+    stem = os.path.splitext(path)[0]
+    for candidate in (path, stem + '.parquet', stem + '.csv'):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def export_parquet_to_csv(parquet_path, csv_path=None):
+    """Streams a Parquet mentions table out to CSV batch by batch. Returns the CSV path."""
+    if csv_path is None:
+        csv_path = os.path.splitext(parquet_path)[0] + '.csv'
+    rows = iter_parquet_rows(parquet_path)
+    tmp_path = csv_path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding=CSV_ENCODING) as outfile:
+        writer = csv.writer(outfile, lineterminator=os.linesep)
+        writer.writerows(rows)
+    os.replace(tmp_path, csv_path)
+    return csv_path
+
+
+def load_comments(comments_path, columns=None):
+    """Loads a comments table as a DataFrame, in the order the comments were fetched."""
+    if str(comments_path).endswith('.parquet'):
+        comments = read_table(comments_path, columns=columns)
+    else: # Keep ids and bodies as text ("nan", "123" etc. are valid comment bodies)
+        text_columns = {col: str for col in COMMENT_COLUMNS if col not in INTEGER_COLUMNS}
+        comments = read_table(comments_path, usecols=columns, dtype=text_columns, keep_default_na=False)
+    if 'body' in comments.columns:
+        comments['body'] = comments['body'].fillna('')
+    return comments
+
+
+def load_comments_text_by_post(comments_path):
+    """
+    Rebuilds the old scraped_comments_sample text per post from a comments table:
+    {post_id: "comment 1 || comment 2 || ..."}.
+    """
+    comments = load_comments(comments_path, columns=['post_id', 'body'])
+    return {str(post_id): COMMENTS_SAMPLE_SEPARATOR.join(bodies)
+            for post_id, bodies in comments.groupby('post_id', sort=False)['body']}
+
+
+def load_comments_by_post(comments_path):
+    """The comments of each post as (body, score) pairs, in fetch order: {post_id: [(body, score), ...]}."""
+    comments = load_comments(comments_path, columns=['post_id', 'score', 'body'])
+    scores = pd.to_numeric(comments['score'], errors='coerce').fillna(0).astype(int)
+    comments_by_post = {}
+    for post_id, body, score in zip(comments['post_id'], comments['body'], scores):
+        comments_by_post.setdefault(str(post_id), []).append((body, score))
+    return comments_by_post
+
+
+def read_table(path, **kwargs):
+    """Loads a CSV or Parquet table into a DataFrame, picking the reader by extension."""
+    path = str(path)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, **kwargs)
+    return pd.read_csv(path, **kwargs)
+
+
+def is_comments_table(path):
+    return '_reddit_comments' in os.path.basename(str(path))
+
+
+def pick_table_files(paths, include_comments=False):
+    """
+    Given CSV/Parquet paths, keeps one per table name, preferring Parquet over a CSV export
+    of the same table. Comments tables are left out unless include_comments is set.
+    Returns them sorted by path.
+    """
+    chosen = {}
+    for path in paths:
+        stem, ext = os.path.splitext(str(path))
+        if ext not in ('.csv', '.parquet') or (is_comments_table(path) and not include_comments):
+            continue
+        if stem not in chosen or ext == '.parquet':
+            chosen[stem] = path
+    return [chosen[stem] for stem in sorted(chosen)]
@@ -0,0 +1,101 @@
+# nba_rate_limiter.py
+
+import logging
+import random
+import threading
+import time
+
+import requests
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def is_throttling_error(error):
+    """
+    True for failures that mean stats.nba.com wants us to slow down: timeouts, dropped
+    connections and HTTP 429/503. (stats.nba.com mostly throttles by letting requests hang.)
+    """
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status in THROTTLE_STATUS_CODES
+
+
+class AdaptiveThrottle:
+    """
+    Thread-safe AIMD pacing shared by every nba_api worker.
+
+    Calls are spaced `delay` seconds apart across all workers. Each healthy response adds
+    `speedup_step` calls/second to the rate (until calls are `min_delay` apart); a throttling
+    failure multiplies the delay by `backoff_factor` (up to `max_delay`) and holds every
+    worker back for a jittered pause of at least `cooldown` seconds, so workers that hit the wall together don't all retry
+    in the same instant. Failures of calls sent before the last back-off count as the same
+    congestion event, so a burst of in-flight timeouts backs off once, not once per call.
+    """
+
+    def __init__(self, initial_delay, min_delay, max_delay, speedup_step, cooldown=0.0,
+                 backoff_factor=2.0, jitter=0.5):
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+        self.delay = min(max(float(initial_delay), self.min_delay), self.max_delay)
+        self.speedup_step = float(speedup_step)
+        self.cooldown = float(cooldown)
+        self.backoff_factor = float(backoff_factor)
+        self.jitter = float(jitter)
+        self.total_wait_seconds = 0.0
+        self.successes = 0
+        self.throttled = 0
+        self._next_slot = 0.0
+        self._last_backoff = float('-inf')
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until this worker's turn to call the API and returns the (monotonic) time it got
+        the go-ahead. A worker whose slot was handed out before a back-off queues up again.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self.delay
+            if slot > now:
+                time.sleep(slot - now)
+            with self._lock:
+                self.total_wait_seconds += time.monotonic() - now
+                if self._last_backoff <= now:
+                    return time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.delay = max(self.min_delay, 1 / (1 / self.delay + self.speedup_step))
+
+    def record_throttled(self, call_started):
+        """
+        Slows everyone down after a timeout or 429 on a call that started at `call_started`
+        (as returned by acquire()). Returns the pause applied before the next call.
+        """
+        with self._lock:
+            self.throttled += 1
+            if call_started < self._last_backoff:
+                return max(0.0, self._next_slot - time.monotonic()) # Already backed off for this burst
+            now = time.monotonic()
+            self._last_backoff = now
+            self.delay = min(self.max_delay, self.delay * self.backoff_factor)
+            pause = max(self.delay, self.cooldown) * (1 + random.uniform(0, self.jitter))
+            self._next_slot = max(self._next_slot, now + pause)
+        logging.warning(f"Throttled by the API; spacing calls {self.delay:.2f}s apart (pausing {pause:.2f}s).")
+        return pause
+
+    def backoff_seconds(self, attempt, base_delay, max_backoff=None):
+        """Exponential retry backoff with jitter: somewhere in [50%, 100%] of base_delay * 2**attempt."""
+        backoff = base_delay * (2 ** attempt)
+        if max_backoff is not None:
+            backoff = min(backoff, max_backoff)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def log_summary(self):
+        with self._lock:
+            logging.info(f"API pacing: {self.successes} calls, {self.throttled} throttled, "
+                         f"{self.total_wait_seconds:.1f}s spent waiting, final spacing {self.delay:.2f}s")
@@ -2,13 +2,21 @@
 
 import pandas as pd
 from nba_api.stats.static import players as nba_static_players
-from nba_api.stats.endpoints import playergamelog, commonplayerinfo, playerprofilev2
+from nba_api.stats.endpoints import playergamelog, commonplayerinfo, playerprofilev2, leaguegamelog
 from nba_api.stats.library.parameters import SeasonAll
 import os
 import time
+import threading
 import logging
-from readPL import read_player_list # Assuming readPL.py is in the same directory or PYTHONPATH
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from nba_rate_limiter import AdaptiveThrottle, is_throttling_error
+from mentions_io import parquet_available
+from player_names import PlayerNameIndex, load_id_cache, save_id_cache, player_file_slug, read_player_list
 import json
+import gzip
+import hashlib
+from datetime import datetime
 
 # --- Configuration ---
 # Seasons to fetch data for. Example: "2023-24", "2022-23".
@@ -19,12 +27,41 @@ SEASONS_TO_FETCH = ["2022","2023", "2024"] # For 2023-24 and 2022-23 seasons res
 # Output directory for raw player stats
 RAW_STATS_DIR = 'data/new/player_stats'
 PLAYER_ID_CACHE_FILE = os.path.join(RAW_STATS_DIR, 'player_id_cache.json') # To store player_name:id mapping
+FETCH_ADVANCED_STATS = False # Optional: also write {player}_advanced_stats.csv per season (one profile call per player)
+FETCH_COMMON_INFO = False # Optional: also write {player}_common_info.csv (one call per player)
+# Bulk mode: one LeagueGameLog call per season covers every player, instead of one PlayerGameLog call per player
+BULK_GAMELOGS = False
+BULK_GAMELOG_LAYOUT = 'per-player' # 'per-player': season_{year}/{player}_gamelog.csv; 'table': LEAGUE_GAMELOG_DIR
+LEAGUE_GAMELOG_DIR = os.path.join(RAW_STATS_DIR, 'league_gamelog') # season={year}/ partitions of the whole league
+# Incremental mode: only request games on/after the newest stored GAME_DATE and merge them into the season file
+INCREMENTAL_GAMELOGS = False
+# Change set of each run: the game dates added or corrected per player and season, for downstream stages to recompute
+GAMELOG_CHANGES_FILE = os.path.join(RAW_STATS_DIR, 'gamelog_changes.json')
+# Columns (and order) of a PlayerGameLog response; bulk mode writes player files in the same shape
+PLAYER_GAMELOG_COLUMNS = playergamelog.PlayerGameLog.expected_data['PlayerGameLog']
 
 # API Call Configuration
 REQUEST_TIMEOUT = 30  # seconds
 RETRY_ATTEMPTS = 3
 RETRY_DELAY = 5  # seconds (base delay, will increase)
-API_CALL_DELAY = 1.0 # seconds between API calls to be polite
+MAX_RETRY_DELAY = 60 # seconds, cap on the backoff between retries
+API_CALL_DELAY = 1.0 # seconds between API calls to start with; THROTTLE adapts it from here
+MIN_API_CALL_DELAY = 0.3 # Never call faster than this, however healthy responses look
+MAX_API_CALL_DELAY = 30.0
+API_RATE_SPEEDUP_STEP = 0.05 # Calls/second added to the pace after every healthy response
+NBA_FETCH_WORKERS = 4 # Game logs / profiles / player info fetched in parallel; all share THROTTLE
+
+# Response cache: gzipped API responses keyed by a hash of endpoint + parameters.
+# Responses for completed seasons never expire; anything else expires after its endpoint's TTL.
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_DIR = os.path.join(RAW_STATS_DIR, 'response_cache')
+RESPONSE_CACHE_TTL_HOURS = {
+    'PlayerGameLog': 6, # Current season gains games every night
+    'LeagueGameLog': 6,
+    'PlayerProfileV2': 24,
+    'CommonPlayerInfo': 24 * 7,
+}
+DEFAULT_RESPONSE_CACHE_TTL_HOURS = 6
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO,
@@ -34,22 +71,31 @@ logging.basicConfig(level=logging.INFO,
 
 # --- Helper Functions ---
 def load_player_id_cache():
-    if os.path.exists(PLAYER_ID_CACHE_FILE):
-        try:
-            with open(PLAYER_ID_CACHE_FILE, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logging.warning(f"Could not decode JSON from {PLAYER_ID_CACHE_FILE}. Starting with an empty cache.")
-            return {}
-    return {}
+    return load_id_cache(PLAYER_ID_CACHE_FILE)
 
 def save_player_id_cache(cache):
-    os.makedirs(os.path.dirname(PLAYER_ID_CACHE_FILE), exist_ok=True)
-    with open(PLAYER_ID_CACHE_FILE, 'w') as f:
-        json.dump(cache, f, indent=4)
+    """Atomic, and only when there's something new: get_player_id() batches its updates until this is called."""
+    global PLAYER_ID_CACHE_DIRTY
+    with PLAYER_ID_CACHE_LOCK:
+        if not PLAYER_ID_CACHE_DIRTY and os.path.exists(PLAYER_ID_CACHE_FILE):
+            return
+        save_id_cache(cache, PLAYER_ID_CACHE_FILE)
+        PLAYER_ID_CACHE_DIRTY = False
 
 # Global cache for player IDs
 PLAYER_ID_CACHE = load_player_id_cache()
+PLAYER_ID_CACHE_DIRTY = False # New ids not yet written to PLAYER_ID_CACHE_FILE
+PLAYER_ID_CACHE_LOCK = threading.Lock()
+PLAYER_NAME_INDEX = None # PlayerNameIndex over the static player list, built on first use
+# stats.nba.com throttles per client, so every worker paces its calls through one throttle.
+THROTTLE = AdaptiveThrottle(initial_delay=API_CALL_DELAY,
+                            min_delay=MIN_API_CALL_DELAY,
+                            max_delay=MAX_API_CALL_DELAY,
+                            speedup_step=API_RATE_SPEEDUP_STEP,
+                            cooldown=RETRY_DELAY)
+GAMELOG_CHANGES = {} # player_name -> {season: set of new or changed game dates}, written by write_gamelog_changes()
+GAMELOG_CHANGES_LOCK = threading.Lock()
+PLAYER_PROFILE_CACHE = {} # (player_id, per_mode) -> PlayerProfileV2 data frames, for this run
 ALL_NBA_PLAYERS_LIST = None # Cache for all players list from API
 
 def get_all_nba_players_cached():
@@ -65,91 +111,315 @@ def get_all_nba_players_cached():
             ALL_NBA_PLAYERS_LIST = [] # Return empty list on failure to avoid repeated calls
     return ALL_NBA_PLAYERS_LIST
 
+def get_player_name_index():
+    """Builds the normalized name index over all NBA players once and reuses it."""
+    global PLAYER_NAME_INDEX
+    if PLAYER_NAME_INDEX is None:
+        PLAYER_NAME_INDEX = PlayerNameIndex(get_all_nba_players_cached())
+        logging.info(f"Indexed {len(PLAYER_NAME_INDEX)} player name keys.")
+    return PLAYER_NAME_INDEX
 
 def get_player_id(player_name):
     """
-    Retrieves player ID, first from cache, then by searching the API.
-    Uses a more robust full name matching.
+    Retrieves player ID, first from cache, then from the name index. Names match regardless
+    of case, accents, punctuation and Jr./II suffixes ("Luka Doncic" finds "Luka Dončić").
+    New ids are only written to disk by save_player_id_cache().
     """
+    global PLAYER_ID_CACHE_DIRTY
     if player_name in PLAYER_ID_CACHE:
         return PLAYER_ID_CACHE[player_name]
 
-    all_players_list = get_all_nba_players_cached()
-    if not all_players_list:
+    name_index = get_player_name_index()
+    if not len(name_index):
         logging.warning(f"Cannot search for player ID for {player_name} as the all players list is empty.")
         return None
 
-    # Prioritize exact full name match
-    for p in all_players_list:
-        if p['full_name'].lower() == player_name.lower():
-            PLAYER_ID_CACHE[player_name] = p['id']
-            save_player_id_cache(PLAYER_ID_CACHE)
-            return p['id']
-
-    # Fallback: simple substring match (can be ambiguous, use with caution or refine)
-    # For your list, exact match should be fine.
-    # matched_players = [p for p in all_players_list if player_name.lower() in p['full_name'].lower()]
-    # if len(matched_players) == 1:
-    #     p = matched_players[0]
-    #     logging.info(f"Found player {p['full_name']} (ID: {p['id']}) for search term '{player_name}' (substring match).")
-    #     PLAYER_ID_CACHE[player_name] = p['id']
-    #     save_player_id_cache(PLAYER_ID_CACHE)
-    #     return p['id']
-    # elif len(matched_players) > 1:
-    #     logging.warning(f"Ambiguous player name '{player_name}'. Found multiple matches: {[mp['full_name'] for mp in matched_players]}. Please be more specific.")
-    #     return None
+    player = name_index.find(player_name)
+    if player is not None:
+        if player['full_name'] != player_name:
+            logging.info(f"Matched '{player_name}' to {player['full_name']} (ID: {player['id']}).")
+        with PLAYER_ID_CACHE_LOCK:
+            PLAYER_ID_CACHE[player_name] = player['id']
+            PLAYER_ID_CACHE_DIRTY = True
+        return player['id']
 
     logging.warning(f"Player ID not found for '{player_name}'.")
     return None
 
-def make_api_request(endpoint_callable, **kwargs):
-    """Makes an API request with retries and timeout."""
+def season_api_format(season_year_str):
+    """ "2023" -> "2023-24", the season format most stats.nba.com endpoints expect."""
+    next_year_short = str(int(season_year_str) + 1)[-2:]
+    return f"{season_year_str}-{next_year_short}"
+
+def season_is_complete(season_str):
+    """True once a season ("2023" or "2023-24" for 2023-24) is over, playoffs included."""
+    return datetime.now() >= datetime(int(str(season_str)[:4]) + 1, 7, 1)
+
+def response_cache_path(endpoint_name, kwargs):
+    """Cache file for a request: a hash of the endpoint and its parameters, in sorted order."""
+    params = json.dumps({k: str(v) for k, v in kwargs.items()}, sort_keys=True)
+    digest = hashlib.sha256(f"{endpoint_name}?{params}".encode('utf-8')).hexdigest()
+    return os.path.join(RESPONSE_CACHE_DIR, digest[:2], f"{digest}.json.gz")
+
+def response_cache_ttl_hours(endpoint_name, seasons):
+    """None (never expires) when every season the response covers is over, else the endpoint's TTL."""
+    if seasons and all(season_is_complete(s) for s in seasons):
+        return None
+    return RESPONSE_CACHE_TTL_HOURS.get(endpoint_name, DEFAULT_RESPONSE_CACHE_TTL_HOURS)
+
+def load_cached_response(cache_path, ttl_hours):
+    """Returns the cached data frames, or None if the entry is missing, unreadable or expired."""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with gzip.open(cache_path, 'rt', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable response cache entry {cache_path}: {e}")
+        return None
+    if ttl_hours is not None and time.time() - cached['fetched_at'] > ttl_hours * 3600:
+        return None
+    return [pd.DataFrame(frame['data'], columns=frame['columns']) for frame in cached['frames']]
+
+def save_cached_response(cache_path, endpoint_name, kwargs, data_frames):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    cached = {
+        'endpoint': endpoint_name,
+        'params': {k: str(v) for k, v in kwargs.items()},
+        'fetched_at': time.time(),
+        'frames': [json.loads(df.to_json(orient='split', index=False)) for df in data_frames],
+    }
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp" # Unique per worker thread
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(cached, f)
+    os.replace(tmp_path, cache_path)
+
+def make_api_request(endpoint_callable, seasons=None, **kwargs):
+    """
+    Makes an API request with retries and timeout, answering from the response cache when it can.
+    `seasons` are the seasons the response covers (defaults to the `season` parameter); once
+    they're all over, the cached response is kept for good. Cache hits skip the throttle.
+    """
+    endpoint_name = endpoint_callable.__name__
+    if seasons is None and 'season' in kwargs:
+        seasons = [kwargs['season']]
+    cache_path = response_cache_path(endpoint_name, kwargs) if RESPONSE_CACHE_ENABLED else None
+    if cache_path:
+        data = load_cached_response(cache_path, response_cache_ttl_hours(endpoint_name, seasons))
+        if data is not None:
+            logging.debug(f"Response cache hit for {endpoint_name} with args {kwargs}")
+            return data
+
     for attempt in range(RETRY_ATTEMPTS):
+        call_started = THROTTLE.acquire() # Be polite: waits for this call's slot
         try:
-            logging.debug(f"Attempt {attempt + 1} for {endpoint_callable.__name__} with args {kwargs}")
+            logging.debug(f"Attempt {attempt + 1} for {endpoint_name} with args {kwargs}")
             data = endpoint_callable(**kwargs, timeout=REQUEST_TIMEOUT).get_data_frames()
-            time.sleep(API_CALL_DELAY) # Be polite after a successful call
+            THROTTLE.record_success()
+            if cache_path:
+                save_cached_response(cache_path, endpoint_name, kwargs, data)
             return data
         except Exception as e:
-            logging.warning(f"API request failed for {endpoint_callable.__name__} (Attempt {attempt + 1}/{RETRY_ATTEMPTS}): {e}")
+            logging.warning(f"API request failed for {endpoint_name} (Attempt {attempt + 1}/{RETRY_ATTEMPTS}): {e}")
+            throttled = is_throttling_error(e)
+            if throttled:
+                THROTTLE.record_throttled(call_started) # Slows every worker, even when this call gives up
             if attempt < RETRY_ATTEMPTS - 1:
-                delay = RETRY_DELAY * (2 ** attempt) # Exponential backoff
-                logging.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+                if not throttled: # A throttled retry just waits out the throttle in the next acquire()
+                    delay = THROTTLE.backoff_seconds(attempt, RETRY_DELAY, MAX_RETRY_DELAY) # Exponential backoff with jitter
+                    logging.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
             else:
-                logging.error(f"All retry attempts failed for {endpoint_callable.__self__.__class__.__name__}.")
+                logging.error(f"All retry attempts failed for {endpoint_name}.")
                 return None # Or raise the exception: raise e
 
-def fetch_player_game_logs(player_id, player_name, season_year_str):
-    """Fetches and saves player game logs for a specific season."""
+def gamelog_file_path(player_name, season_year_str):
+    return os.path.join(RAW_STATS_DIR, f"season_{season_year_str}", f"{player_file_slug(player_name)}_gamelog.csv")
+
+def game_log_dates(gamelog_df):
+    return pd.to_datetime(gamelog_df['GAME_DATE'], format='%b %d, %Y', errors='coerce')
+
+def load_stored_game_log(player_name, season_year_str):
+    """The season's game log already on disk (ids kept as text, e.g. "0022300050"), or None."""
+    file_name = gamelog_file_path(player_name, season_year_str)
+    if not os.path.exists(file_name):
+        return None
+    try:
+        return pd.read_csv(file_name, dtype={'SEASON_ID': str, 'Player_ID': str, 'Game_ID': str})
+    except Exception as e:
+        logging.warning(f"Could not read stored game log {file_name}: {e}")
+        return None
+
+def last_stored_game_date(player_name, season_year_str):
+    stored_df = load_stored_game_log(player_name, season_year_str)
+    if stored_df is None or stored_df.empty:
+        return None
+    newest = game_log_dates(stored_df).max()
+    return None if pd.isna(newest) else newest.date()
+
+def record_gamelog_changes(player_name, season_year_str, added_df):
+    added_dates = game_log_dates(added_df).dropna().dt.strftime('%Y-%m-%d')
+    if added_dates.empty:
+        return
+    with GAMELOG_CHANGES_LOCK:
+        GAMELOG_CHANGES.setdefault(player_name, {}).setdefault(season_year_str, set()).update(added_dates)
+
+def changed_games(gamelog_df, stored_df):
+    """The rows of `gamelog_df` whose game is missing from `stored_df` or stored with other values."""
+    columns = [column for column in gamelog_df.columns if column in stored_df.columns]
+    stored_rows = set(map(tuple, stored_df[columns].astype(str).values.tolist()))
+    fetched_rows = gamelog_df[columns].astype(str).values.tolist()
+    return gamelog_df[[tuple(row) not in stored_rows for row in fetched_rows]]
+
+def save_game_log(player_name, season_year_str, gamelog_df, incremental=False):
+    """
+    Writes a player's season game log, newest game first. Incremental saves merge `gamelog_df`
+    into the stored file instead of replacing it; a re-fetched game replaces its stored row, so
+    stat corrections land. Either way, games that are new or changed go into the run's change
+    set. Returns the saved log.
+    """
+    file_name = gamelog_file_path(player_name, season_year_str)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True) # Create season-specific subdirectory
+    gamelog_df = gamelog_df.astype({'Game_ID': str})
+    stored_df = load_stored_game_log(player_name, season_year_str)
+    if stored_df is None:
+        added_df = gamelog_df
+    else:
+        added_df = changed_games(gamelog_df, stored_df)
+    if incremental and stored_df is not None:
+        if added_df.empty:
+            logging.info(f"No new or changed games for {player_name} in season {season_year_str}.")
+            return stored_df
+        kept_df = stored_df[~stored_df['Game_ID'].isin(gamelog_df['Game_ID'])]
+        gamelog_df = pd.concat([gamelog_df, kept_df], ignore_index=True)
+        gamelog_df = (gamelog_df.assign(_game_date=game_log_dates(gamelog_df))
+                      .sort_values('_game_date', ascending=False, kind='stable')
+                      .drop(columns='_game_date'))
+
+    tmp_name = file_name + '.tmp'
+    gamelog_df.to_csv(tmp_name, index=False)
+    os.replace(tmp_name, file_name)
+    record_gamelog_changes(player_name, season_year_str, added_df)
+    logging.info(f"Saved {len(gamelog_df)} games ({len(added_df)} new or changed) to {file_name}")
+    return gamelog_df
+
+def write_gamelog_changes(file_path=GAMELOG_CHANGES_FILE):
+    """Writes the change set of this run: {"players": {name: {season: [new or changed "YYYY-MM-DD" dates]}}}."""
+    with GAMELOG_CHANGES_LOCK:
+        players = {player_name: {season: sorted(dates) for season, dates in sorted(seasons.items())}
+                   for player_name, seasons in sorted(GAMELOG_CHANGES.items())}
+    change_set = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'games_added': sum(len(dates) for seasons in players.values() for dates in seasons.values()),
+        'players': players,
+    }
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path + '.tmp', 'w') as f:
+        json.dump(change_set, f, indent=4)
+    os.replace(file_path + '.tmp', file_path)
+    logging.info(f"Game log change set: {change_set['games_added']} new games, written to {file_path}")
+    return change_set
+
+def fetch_player_game_logs(player_id, player_name, season_year_str, incremental=INCREMENTAL_GAMELOGS):
+    """
+    Fetches and saves player game logs for a specific season. Incremental fetches only ask
+    for games from the newest stored GAME_DATE on and merge them into the stored file.
+    """
     logging.info(f"Fetching game logs for {player_name} (ID: {player_id}) for season {season_year_str}...")
     # The API uses 'YYYY' for season, e.g., "2023" for the 2023-24 season.
     # If your SEASONS_TO_FETCH is "2023-24", you'd pass "2023" to the API.
     # Our SEASONS_TO_FETCH is already in "YYYY" format.
+    date_range = {}
+    last_date = last_stored_game_date(player_name, season_year_str) if incremental else None
+    if last_date is not None:
+        # Inclusive, so a game stored before its stats were final on that day comes back too
+        date_range['date_from_nullable'] = last_date.strftime('%m/%d/%Y')
+        logging.info(f"Incremental: requesting {player_name}'s games since {last_date}.")
 
     gamelog_data_frames = make_api_request(playergamelog.PlayerGameLog,
                                            player_id=player_id,
                                            season=season_year_str,
-                                           season_type_all_star="Regular Season") # Or "Playoffs", "All Star", etc.
+                                           season_type_all_star="Regular Season", # Or "Playoffs", "All Star", etc.
+                                           **date_range)
 
     if gamelog_data_frames and len(gamelog_data_frames) > 0:
         gamelog_df = gamelog_data_frames[0]
         if not gamelog_df.empty:
-            # Create season-specific subdirectory
-            season_output_dir = os.path.join(RAW_STATS_DIR, f"season_{season_year_str}")
-            os.makedirs(season_output_dir, exist_ok=True)
-
-            file_name = os.path.join(season_output_dir, f"{player_name.replace(' ', '_').lower()}_gamelog.csv")
-            gamelog_df.to_csv(file_name, index=False)
-            logging.info(f"Saved {len(gamelog_df)} games to {file_name}")
-            return gamelog_df
+            return save_game_log(player_name, season_year_str, gamelog_df, incremental=incremental)
         else:
-            logging.info(f"No game logs found for {player_name} for season {season_year_str}.")
+            logging.info(f"No {'new ' if date_range else ''}game logs found for {player_name} for season {season_year_str}.")
             return pd.DataFrame() # Return empty DataFrame
     else:
         logging.warning(f"Failed to fetch game logs for {player_name} for season {season_year_str}.")
         return pd.DataFrame()
 
+def fetch_league_game_logs(season_year_str, date_from=None):
+    """
+    Fetches every player's game logs for a season in one LeagueGameLog call and returns them
+    reshaped like PlayerGameLog output (plus PLAYER_NAME), newest game first.
+    `date_from` (a date) limits it to games on or after that day.
+    """
+    logging.info(f"Fetching league-wide game logs for season {season_year_str}...")
+    date_range = {'date_from_nullable': date_from.strftime('%m/%d/%Y')} if date_from else {}
+    league_data_frames = make_api_request(leaguegamelog.LeagueGameLog,
+                                          player_or_team_abbreviation='P',
+                                          season=season_api_format(season_year_str),
+                                          season_type_all_star="Regular Season",
+                                          **date_range)
+    if not league_data_frames or league_data_frames[0].empty:
+        logging.warning(f"Failed to fetch league game logs for season {season_year_str}.")
+        return None
+
+    league_df = league_data_frames[0].rename(columns={'PLAYER_ID': 'Player_ID', 'GAME_ID': 'Game_ID'})
+    # LeagueGameLog dates are "2023-10-24"; PlayerGameLog's (what every reader parses) are "OCT 24, 2023"
+    game_dates = pd.to_datetime(league_df['GAME_DATE'])
+    league_df['GAME_DATE'] = game_dates.dt.strftime('%b %d, %Y').str.upper()
+    league_df = league_df.assign(_game_date=game_dates).sort_values(['_game_date', 'Game_ID'], ascending=False)
+    return league_df[PLAYER_GAMELOG_COLUMNS + ['PLAYER_NAME']].reset_index(drop=True)
+
+def fan_out_league_game_logs(league_df, player_ids, season_year_str, incremental=False):
+    """Writes season_{year}/{player}_gamelog.csv for each of `player_ids` ({name: id}) from a league game log."""
+    games_by_player = {player_id: games for player_id, games in league_df.groupby('Player_ID', sort=False)}
+    for player_name, player_id in player_ids.items():
+        gamelog_df = games_by_player.get(int(player_id))
+        if gamelog_df is None:
+            logging.info(f"No {'new ' if incremental else ''}game logs found for {player_name} for season {season_year_str}.")
+            continue
+        save_game_log(player_name, season_year_str, gamelog_df[PLAYER_GAMELOG_COLUMNS], incremental=incremental)
+
+def write_league_game_log_partition(league_df, season_year_str):
+    """Saves a season's league game log as the season={year} partition of LEAGUE_GAMELOG_DIR (Parquet if available)."""
+    partition_dir = os.path.join(LEAGUE_GAMELOG_DIR, f"season={season_year_str}")
+    os.makedirs(partition_dir, exist_ok=True)
+    if parquet_available():
+        file_name = os.path.join(partition_dir, 'gamelog.parquet')
+        league_df.to_parquet(file_name + '.tmp', index=False)
+    else:
+        file_name = os.path.join(partition_dir, 'gamelog.csv')
+        league_df.to_csv(file_name + '.tmp', index=False)
+    os.replace(file_name + '.tmp', file_name)
+    logging.info(f"Saved {len(league_df)} player-games for season {season_year_str} to {file_name}")
+
+def fetch_bulk_game_logs(season_year_str, player_ids, layout=BULK_GAMELOG_LAYOUT, incremental=INCREMENTAL_GAMELOGS):
+    """
+    Bulk mode for one season: a single LeagueGameLog call, written in the chosen layout.
+    Incremental per-player runs start at the oldest of the players' newest stored games;
+    the league table is always rewritten whole.
+    """
+    date_from = None
+    if incremental and layout != 'table':
+        last_dates = [last_stored_game_date(player_name, season_year_str) for player_name in player_ids]
+        if last_dates and None not in last_dates:
+            date_from = min(last_dates)
+    league_df = fetch_league_game_logs(season_year_str, date_from=date_from)
+    if league_df is None:
+        return None
+    if layout == 'table':
+        write_league_game_log_partition(league_df, season_year_str)
+    else:
+        fan_out_league_game_logs(league_df, player_ids, season_year_str, incremental=date_from is not None)
+    return league_df
+
 # --- Optional: Other data points you might want ---
 def fetch_player_common_info(player_id, player_name):
     """Fetches common player info (birthdate, height, weight, etc.)."""
@@ -160,7 +430,7 @@ def fetch_player_common_info(player_id, player_name):
         info_df = info_data_frames[0] # Usually the first DataFrame has the main info
         if not info_df.empty:
             os.makedirs(RAW_STATS_DIR, exist_ok=True) # Ensure base directory exists
-            file_name = os.path.join(RAW_STATS_DIR, f"{player_name.replace(' ', '_').lower()}_commoninfo.csv")
+            file_name = os.path.join(RAW_STATS_DIR, f"{player_file_slug(player_name)}_commoninfo.csv")
             info_df.to_csv(file_name, index=False)
             logging.info(f"Saved common info to {file_name}")
             return info_df
@@ -168,21 +438,52 @@ def fetch_player_common_info(player_id, player_name):
     return pd.DataFrame()
 
 
+def get_player_profile(player_id, seasons, per_mode="PerGame"):
+    """
+    PlayerProfileV2 data frames for a player, fetched at most once per run. Across runs the
+    response cache keeps them; `seasons` decides whether a cached copy is still good.
+    """
+    cache_key = (player_id, per_mode)
+    if cache_key in PLAYER_PROFILE_CACHE:
+        return PLAYER_PROFILE_CACHE[cache_key]
+
+    profile_data_frames = make_api_request(playerprofilev2.PlayerProfileV2,
+                                           seasons=seasons,
+                                           player_id=player_id,
+                                           per_mode36=per_mode) # Or "Totals", "PerMinute", etc.
+    if not profile_data_frames:
+        return None # Not memoized, so a later call can retry
+    PLAYER_PROFILE_CACHE[cache_key] = profile_data_frames
+    return profile_data_frames
+
+def fetch_player_advanced_stats(player_id, player_name, seasons):
+    """
+    Fetches a player's career profile once and writes the advanced stats file of every
+    requested season from it. Returns {season_year_str: DataFrame}.
+    """
+    logging.info(f"Fetching advanced stats for {player_name} (ID: {player_id}) for seasons {', '.join(seasons)}...")
+    profile_data_frames = get_player_profile(player_id, seasons)
+    if not profile_data_frames:
+        logging.warning(f"Failed to fetch player profile (advanced stats) for {player_name}.")
+        return {season_year_str: pd.DataFrame() for season_year_str in seasons}
+    return {season_year_str: save_season_advanced_stats(profile_data_frames, player_name, season_year_str)
+            for season_year_str in seasons}
+
 def fetch_player_advanced_stats_per_season(player_id, player_name, season_year_str):
     """
     Fetches advanced stats for a player for a specific season.
+    The career profile behind it is memoized, so calling this per season costs one API call per player.
+    """
+    return fetch_player_advanced_stats(player_id, player_name, [season_year_str])[season_year_str]
+
+def save_season_advanced_stats(profile_data_frames, player_name, season_year_str):
+    """
+    Splits one season's rows out of the PlayerProfileV2 data frames and saves them.
     PlayerProfileV2 is a rich endpoint but can be complex.
     It often returns stats split by regular season, playoffs, etc.
     """
-    logging.info(f"Fetching advanced stats for {player_name} (ID: {player_id}) for season {season_year_str}...")
-    # The season format for PlayerProfileV2 might be "YYYY-YY", e.g., "2023-24"
-    # Let's construct that from our "YYYY" format.
-    next_year_short = str(int(season_year_str) + 1)[-2:]
-    season_api_format = f"{season_year_str}-{next_year_short}"
-
-    profile_data_frames = make_api_request(playerprofilev2.PlayerProfileV2,
-                                           player_id=player_id,
-                                           per_mode36="PerGame") # Or "Totals", "PerMinute", etc.
+    # The season format for PlayerProfileV2 is "YYYY-YY", e.g., "2023-24"
+    season_id = season_api_format(season_year_str)
 
     if profile_data_frames:
         # PlayerProfileV2 returns many DataFrames.
@@ -191,36 +492,85 @@ def fetch_player_advanced_stats_per_season(player_id, player_name, season_year_s
         # Example: Find DF that has a 'SEASON_ID' column and matches your target season.
         target_df = None
         for i, df in enumerate(profile_data_frames):
-            if 'SEASON_ID' in df.columns and not df[df['SEASON_ID'] == season_api_format].empty:
+            if 'SEASON_ID' in df.columns and not df[df['SEASON_ID'] == season_id].empty:
                  # Check if it's regular season data if multiple tables match season
                 if "Regular Season" in df.name if hasattr(df, 'name') else True: # Heuristic
-                    target_df = df[df['SEASON_ID'] == season_api_format]
-                    logging.debug(f"Found advanced stats in DataFrame index {i} for season {season_api_format}")
+                    target_df = df[df['SEASON_ID'] == season_id]
+                    logging.debug(f"Found advanced stats in DataFrame index {i} for season {season_id}")
                     break
             # Alternative: Check for typical advanced stats columns
             # typical_adv_cols = {'AST_PCT', 'REB_PCT', 'USG_PCT', 'PIE'}
-            # if 'SEASON_ID' in df.columns and typical_adv_cols.issubset(df.columns) and not df[df['SEASON_ID'] == season_api_format].empty:
-            #     target_df = df[df['SEASON_ID'] == season_api_format]
-            #     logging.debug(f"Found potential advanced stats in DataFrame index {i} for season {season_api_format} based on columns.")
+            # if 'SEASON_ID' in df.columns and typical_adv_cols.issubset(df.columns) and not df[df['SEASON_ID'] == season_id].empty:
+            #     target_df = df[df['SEASON_ID'] == season_id]
+            #     logging.debug(f"Found potential advanced stats in DataFrame index {i} for season {season_id} based on columns.")
             #     break
 
 
         if target_df is not None and not target_df.empty:
             season_output_dir = os.path.join(RAW_STATS_DIR, f"season_{season_year_str}")
             os.makedirs(season_output_dir, exist_ok=True)
-            file_name = os.path.join(season_output_dir, f"{player_name.replace(' ', '_').lower()}_advanced_stats.csv")
+            file_name = os.path.join(season_output_dir, f"{player_file_slug(player_name)}_advanced_stats.csv")
             target_df.to_csv(file_name, index=False)
             logging.info(f"Saved advanced stats to {file_name}")
             return target_df
         else:
-            logging.info(f"No specific advanced stats DataFrame found for {player_name} for season {season_api_format} in PlayerProfileV2 output.")
+            logging.info(f"No specific advanced stats DataFrame found for {player_name} for season {season_id} in PlayerProfileV2 output.")
             return pd.DataFrame()
     else:
-        logging.warning(f"Failed to fetch player profile (advanced stats) for {player_name} for season {season_api_format}.")
+        logging.warning(f"Failed to fetch player profile (advanced stats) for {player_name} for season {season_id}.")
         return pd.DataFrame()
 
+def player_fetch_tasks(player_id, player_name, include_game_logs=True, incremental=INCREMENTAL_GAMELOGS):
+    """The API fetches for one player, as (function, args) pairs that can run on any worker."""
+    tasks = []
+    # Optional: Fetch common player info (once per player, not per season)
+    if FETCH_COMMON_INFO:
+        tasks.append((fetch_player_common_info, (player_id, player_name)))
+    # Optional: Advanced stats for every season from one career profile call
+    if FETCH_ADVANCED_STATS:
+        tasks.append((fetch_player_advanced_stats, (player_id, player_name, SEASONS_TO_FETCH)))
+    # Fetch Game Logs (Primary Data)
+    if include_game_logs:
+        for season_year in SEASONS_TO_FETCH:
+            tasks.append((fetch_player_game_logs, (player_id, player_name, season_year, incremental)))
+    return tasks
+
+def run_player_fetches(player_ids, workers=NBA_FETCH_WORKERS, bulk=BULK_GAMELOGS, bulk_layout=BULK_GAMELOG_LAYOUT,
+                       incremental=INCREMENTAL_GAMELOGS):
+    """
+    Runs every player's fetches on a thread pool. Each task writes its own file, and all of
+    them pace their API calls through THROTTLE, so adding workers never outruns the API.
+    In bulk mode game logs come from one league-wide call per season instead of one per player.
+    """
+    tasks = [task for player_name, player_id in player_ids.items()
+             for task in player_fetch_tasks(player_id, player_name, include_game_logs=not bulk, incremental=incremental)]
+    if bulk:
+        tasks += [(fetch_bulk_game_logs, (season_year, player_ids, bulk_layout, incremental))
+                  for season_year in SEASONS_TO_FETCH]
+    logging.info(f"Fetching {len(tasks)} player/season datasets with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nba-fetch") as executor:
+        futures = {executor.submit(func, *func_args): (func, func_args) for func, func_args in tasks}
+        for future in as_completed(futures):
+            func, func_args = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"{func.__name__}{func_args[1:]} failed: {e}")
+    THROTTLE.log_summary()
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch NBA game logs (and optionally profiles/player info) for players.txt.")
+    parser.add_argument('--workers', type=int, default=NBA_FETCH_WORKERS,
+                        help=f"Parallel API workers, all paced by one adaptive throttle (default: {NBA_FETCH_WORKERS})")
+    parser.add_argument('--bulk', action='store_true', default=BULK_GAMELOGS,
+                        help="Fetch game logs with one league-wide LeagueGameLog call per season")
+    parser.add_argument('--bulk-layout', choices=['per-player', 'table'], default=BULK_GAMELOG_LAYOUT,
+                        help="per-player: season_{year}/{player}_gamelog.csv files; table: season-partitioned league table")
+    parser.add_argument('--incremental', action='store_true', default=INCREMENTAL_GAMELOGS,
+                        help="Only fetch games since the newest stored GAME_DATE and merge them into the season files")
+    args = parser.parse_args()
+
     # Ensure the main raw stats directory exists
     os.makedirs(RAW_STATS_DIR, exist_ok=True)
 
@@ -240,28 +590,16 @@ if __name__ == "__main__":
     logging.info("Player ID caching complete.")
 
 
+    player_ids = {}
     for player_name in target_player_names:
         player_id = get_player_id(player_name) # Get from cache or fetch
-
         if not player_id:
             logging.warning(f"Skipping {player_name} as ID could not be found.")
             continue
+        player_ids[player_name] = player_id
 
-        logging.info(f"--- Processing Player: {player_name} (ID: {player_id}) ---")
-
-        # Optional: Fetch common player info (once per player, not per season)
-        # fetch_player_common_info(player_id, player_name)
-        # time.sleep(API_CALL_DELAY) # Pause after common info call
-
-        for season_year in SEASONS_TO_FETCH:
-            logging.info(f"--- Season: {season_year} ({int(season_year)}-{int(season_year)+1}) ---")
-
-            # Fetch Game Logs (Primary Data)
-            fetch_player_game_logs(player_id, player_name, season_year)
-            time.sleep(API_CALL_DELAY) # Pause
-
-            # Optional: Fetch Advanced Stats per season
-            # fetch_player_advanced_stats_per_season(player_id, player_name, season_year)
-            # time.sleep(API_CALL_DELAY) # Pause
+    run_player_fetches(player_ids, workers=args.workers, bulk=args.bulk, bulk_layout=args.bulk_layout,
+                       incremental=args.incremental)
+    write_gamelog_changes()
 
     logging.info("NBA data acquisition process finished.")
\ No newline at end of file
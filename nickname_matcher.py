@@ -0,0 +1,96 @@
+# nickname_matcher.py
+
+import json
+import logging
+from collections import deque
+
+from player_names import name_keys, normalize_text
+
+PLAYER_NICKNAMES_FILE = 'data/json/nicknames.json'
+
+
+class NicknameMatcher:
+    """
+    Aho-Corasick automaton over every player's name and nicknames. matches() tags a text
+    with all players it mentions in one linear scan, however many players are tracked.
+    Matching is case-, accent- and punctuation-insensitive and respects word boundaries,
+    so "Gilgeous-Alexander" matches "gilgeous alexander" but "Bron" doesn't match "Bronx".
+    """
+
+    def __init__(self, terms_by_player):
+        self.players = list(terms_by_player)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        for player_id, terms in terms_by_player.items():
+            for term in terms:
+                pattern = normalize_text(term)
+                if pattern.strip():
+                    self._add_pattern(pattern, player_id)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern, player_id):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state].add(player_id)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def matches(self, text):
+        """Returns the set of player ids mentioned in `text`."""
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in normalize_text(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def mentions(self, text, player_id):
+        return player_id in self.matches(text)
+
+
+def load_nickname_matcher(file_path=PLAYER_NICKNAMES_FILE, player_names=None):
+    """
+    Builds a NicknameMatcher from nicknames.json. Player ids are the names in `player_names`
+    (e.g. from players.txt), paired with nickname entries by player_names.name_key(); players without
+    an entry match on their name alone. Without `player_names`, every entry in the file is used.
+    """
+    try:
+        with open(file_path, 'r') as f:
+            nickname_data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logging.warning(f"Could not load nicknames from {file_path} ({e}). Matching names only.")
+        nickname_data = []
+
+    if player_names is None:
+        player_names = [entry['name'] for entry in nickname_data if entry.get('name')]
+    terms_by_player = {name: [name] for name in player_names}
+    player_by_key = {key: name for name in player_names for key in reversed(name_keys(name))}
+    for entry in nickname_data:
+        player_name = next((player_by_key[key] for key in name_keys(entry.get('name')) if key in player_by_key), None)
+        if player_name is not None:
+            terms_by_player[player_name].extend(str(n) for n in entry.get('nicknames', []) if str(n).strip())
+    logging.info(f"Compiled nickname matcher for {len(terms_by_player)} players.")
+    return NicknameMatcher(terms_by_player)
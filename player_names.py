@@ -0,0 +1,119 @@
+# player_names.py
+
+import json
+import logging
+import os
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+# Generational suffixes that the API, players.txt and Reddit don't agree on ("Jaren Jackson Jr.")
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+# Names people use -> the full_name nba_api lists the player under
+PLAYER_NAME_ALIASES = {
+    'Herb Jones': 'Herbert Jones',
+    'Moe Wagner': 'Moritz Wagner',
+}
+
+
+def normalize_text(text):
+    """
+    Lower-cases, strips accents and turns every run of punctuation/whitespace into one
+    space, padded with a space on both ends: "Dončić's 40-pt game!" -> " doncic s 40 pt game ".
+    The padding lets a pattern " luka " only match whole words.
+    """
+    if not isinstance(text, str):
+        return ' '
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' ' + ' '.join(_SEPARATORS.sub(' ', text.casefold()).split()) + ' '
+
+
+def name_key(name):
+    """Lookup key for a player name: "Luka Dončić", "luka doncic" and "shai_gilgeous-alexander" style variants agree."""
+    return normalize_text(name).strip()
+
+
+def name_keys(name):
+    """The key of a name, plus the key without a trailing Jr./Sr./II... suffix if it has one."""
+    key = name_key(name)
+    tokens = key.split()
+    if len(tokens) > 2 and tokens[-1] in NAME_SUFFIXES:
+        return [key, ' '.join(tokens[:-1])]
+    return [key]
+
+
+def read_player_list(file_path='players.txt'):
+    """The tracked players, one name per non-blank line of players.txt."""
+    with open(file_path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def player_file_slug(player_name):
+    """File-name slug used for every per-player file: "LeBron James" -> "lebron_james"."""
+    return player_name.replace(' ', '_').lower()
+
+
+class PlayerNameIndex:
+    """
+    Name -> player lookup over nba_api's static player list, built once. Names are matched
+    by name_key() and PLAYER_NAME_ALIASES first, then with generational suffixes dropped on
+    both sides ("Kelly Oubre" -> "Kelly Oubre Jr."), so "Gary Payton" stays Gary Payton.
+    When a name fits several players, an active player wins; otherwise it's ambiguous.
+    """
+
+    def __init__(self, players, aliases=PLAYER_NAME_ALIASES):
+        self._players_by_key = {}
+        self._players_by_base_key = {} # Keys with the suffix dropped
+        for player in players:
+            keys = name_keys(player['full_name'])
+            self._players_by_key.setdefault(keys[0], []).append(player)
+            self._players_by_base_key.setdefault(keys[-1], []).append(player)
+        for alias, full_name in aliases.items():
+            targets = self._players_by_key.get(name_key(full_name))
+            if targets:
+                self._players_by_key.setdefault(name_key(alias), []).extend(targets)
+
+    def __len__(self):
+        return len(self._players_by_key)
+
+    def find(self, name):
+        """Returns the static player dict ({'id', 'full_name', 'is_active', ...}) for a name, or None."""
+        keys = name_keys(name)
+        lookups = [(self._players_by_key, keys[0]), (self._players_by_base_key, keys[-1])]
+        for players_by_key, key in lookups:
+            candidates = players_by_key.get(key, [])
+            if len(candidates) > 1:
+                active = [p for p in candidates if p.get('is_active')]
+                candidates = active if len(active) == 1 else candidates
+            if len(candidates) == 1:
+                return candidates[0]
+            if candidates:
+                logging.warning(f"Ambiguous player name '{name}'. Found multiple matches: "
+                                f"{[(p['full_name'], p['id']) for p in candidates]}. Please be more specific.")
+                return None
+        return None
+
+    def player_id(self, name):
+        player = self.find(name)
+        return player['id'] if player else None
+
+
+def load_id_cache(file_path):
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logging.warning(f"Could not decode JSON from {file_path}. Starting with an empty cache.")
+    return {}
+
+
+def save_id_cache(cache, file_path):
+    """Writes the whole cache to a temp file and swaps it in, so a crash never leaves half a file."""
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=4)
+    os.replace(tmp_path, file_path)
@@ -77,6 +77,13 @@ def load_sentiment(sentiment_file):
             print(f"  ⚠️ Dropping {invalid_dates} rows with invalid dates")
             df = df.dropna(subset=["post_created_utc"])
         
+        # Keep only posts whose title/body actually name this player (tagged by PLEASEsentiment.py)
+        if "player_mentioned" in df.columns:
+            unattributed = (df["player_mentioned"] == 0).sum()
+            if unattributed > 0:
+                print(f"  ⚠️ Dropping {unattributed} posts that don't mention the player")
+                df = df[df["player_mentioned"] != 0]
+        
         # Calculate compound sentiment as average of title, body, and comments
         df["compound_avg"] = df[["title_compound", 
                                 "body_compound",
@@ -85,7 +92,7 @@ def load_sentiment(sentiment_file):
         # Floor date to day for matching
         df["post_date"] = df["post_created_utc"].dt.floor("D")
         
-        # Handle duplicate post_ids
+        # Handle duplicate post_ids (tables scraped before back-to-back game windows were merged)
         duplicates = df[df.duplicated(subset=['post_id'], keep=False)]
         if len(duplicates) > 0:
             print(f"  ⚠️ Found {len(duplicates)} entries with duplicate post_ids")
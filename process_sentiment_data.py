@@ -3,6 +3,9 @@ import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 import os
 import logging
+from mentions_io import read_table, find_comments_file, load_comments_text_by_post
+from sentiment_cache import SentimentCache, scorer_version
+from vader_batch import SCORE_COLUMNS, VaderBatchScorer
 
 # Ensure VADER lexicon is available
 try:
@@ -12,6 +15,8 @@ except nltk.downloader.DownloadError:
 
 # Initialize the Sentiment Intensity Analyzer
 sia = SentimentIntensityAnalyzer()
+# Same scores as sia.polarity_scores(), computed a whole column at a time
+BATCH_SCORER = VaderBatchScorer(sia)
 
 # --- Configuration ---
 # Base directory where your 'new' folder containing 'reddit_data' and 'player_stats' is
@@ -19,6 +24,9 @@ BASE_DATA_DIR = 'data/new/'
 REDDIT_DATA_DIR = os.path.join(BASE_DATA_DIR, 'reddit_data')
 PLAYER_STATS_DIR = os.path.join(BASE_DATA_DIR, 'player_stats')
 OUTPUT_DIR = os.path.join(BASE_DATA_DIR, 'processed_data')
+# Scores shared with PLEASEsentiment.py: a text either stage already scored isn't scored again
+SENTIMENT_CACHE_FILE = os.path.join(BASE_DATA_DIR, 'sentiment_cache.sqlite3')
+SENTIMENT_CACHE = None # SentimentCache over SENTIMENT_CACHE_FILE, opened when the script runs
 
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -46,13 +54,15 @@ def process_player_data(player_slug, target_season):
     logging.info(f"--- Processing player: {player_slug} for season {target_season} ---")
 
     # --- 1. Load Reddit Data ---
-    reddit_file_path = os.path.join(REDDIT_DATA_DIR, f"{player_slug}_reddit_mentions.csv")
+    reddit_file_path = os.path.join(REDDIT_DATA_DIR, f"{player_slug}_reddit_mentions.parquet")
+    if not os.path.exists(reddit_file_path):
+        reddit_file_path = os.path.join(REDDIT_DATA_DIR, f"{player_slug}_reddit_mentions.csv")
     if not os.path.exists(reddit_file_path):
         logging.error(f"Reddit mentions file not found for {player_slug}: {reddit_file_path}")
         return None
     
     try:
-        reddit_df = pd.read_csv(reddit_file_path)
+        reddit_df = read_table(reddit_file_path)
         logging.info(f"Loaded {len(reddit_df)} Reddit mentions for {player_slug}.")
     except Exception as e:
         logging.error(f"Error loading Reddit data for {player_slug}: {e}")
@@ -65,6 +75,13 @@ def process_player_data(player_slug, target_season):
     # --- 2. Sentiment Scoring ---
     # Concatenate title, body, and comments for sentiment analysis
     text_columns = ['post_title', 'post_body', 'scraped_comments_sample']
+    if 'scraped_comments_sample' not in reddit_df.columns:
+        # Newer scrapes keep comments in a separate *_reddit_comments table keyed by post_id
+        comments_file = find_comments_file(reddit_file_path)
+        if comments_file:
+            logging.info(f"Loading comments for {player_slug} from {comments_file}.")
+            comments_by_post = load_comments_text_by_post(comments_file)
+            reddit_df['scraped_comments_sample'] = reddit_df['post_id'].astype(str).map(comments_by_post).fillna('')
     for col in text_columns:
         if col not in reddit_df.columns:
             logging.warning(f"Column '{col}' not found in Reddit data for {player_slug}. Will use empty string.")
@@ -74,9 +91,13 @@ def process_player_data(player_slug, target_season):
     
     # Apply VADER sentiment analysis
     try:
-        reddit_df['compound_sentiment'] = reddit_df['combined_text'].apply(
-            lambda txt: sia.polarity_scores(str(txt))['compound']
-        )
+        texts = [str(txt) for txt in reddit_df['combined_text']]
+        if SENTIMENT_CACHE is not None:
+            reddit_df['compound_sentiment'] = [
+                scores['compound'] for scores in SENTIMENT_CACHE.polarity_scores_batch(texts, BATCH_SCORER)
+            ]
+        else:
+            reddit_df['compound_sentiment'] = BATCH_SCORER.score_batch(texts)[:, SCORE_COLUMNS.index('compound')]
         logging.info(f"Calculated compound sentiment for {player_slug}.")
     except Exception as e:
         logging.error(f"Error during sentiment scoring for {player_slug}: {e}")
@@ -161,6 +182,7 @@ if __name__ == "__main__":
                         handlers=[logging.FileHandler("data_processing.log"),
                                   logging.StreamHandler()])
     
+    SENTIMENT_CACHE = SentimentCache(SENTIMENT_CACHE_FILE, version=scorer_version(sia))
     all_players_merged_data = {}
 
     for slug in PLAYER_SLUGS:
@@ -171,4 +193,6 @@ if __name__ == "__main__":
         else:
             logging.warning(f"Processing failed or resulted in no data for {slug}.")
             
+    logging.info(SENTIMENT_CACHE.summary())
+    SENTIMENT_CACHE.close()
     logging.info("--- All players processed. ---") 
\ No newline at end of file
@@ -0,0 +1,65 @@
+# reddit_rate_limiter.py
+
+import logging
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket shared by every Reddit fetch worker.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. The X-Ratelimit
+    headers Reddit returns are fed back through update_from_headers(), which resizes the
+    refill rate so the remaining budget is spread evenly over the time left in the window,
+    and blocks everyone until the reset once the remaining budget drops to `floor`.
+    """
+
+    def __init__(self, rate, capacity, floor=0):
+        self.default_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.floor = floor
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self.total_wait_seconds = 0.0
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Blocks until a token is available, consumes it and returns the seconds spent waiting."""
+        waited = 0.0
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.total_wait_seconds += waited
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+                self._cond.wait(wait)
+                waited += time.monotonic() - now
+
+    def update_from_headers(self, remaining, reset_in_seconds):
+        """Re-sizes the bucket from the x-ratelimit-remaining / x-ratelimit-reset values."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            usable = remaining - self.floor
+            if usable <= 0:
+                self.blocked_until = now + reset_in_seconds + 1 # Sleep until reset + 1s buffer
+                self.tokens = 0.0
+                self.rate = self.default_rate # Fresh window after the reset; next headers re-size it
+                logging.warning(f"Rate limit floor hit (Remaining: {remaining}). Pausing all workers for {reset_in_seconds + 1:.2f}s.")
+            else:
+                self.rate = usable / max(reset_in_seconds, 1.0)
+                self.tokens = min(self.tokens, usable)
+            self._cond.notify_all()
@@ -0,0 +1,120 @@
+# reddit_store.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Comment trees keep changing while a thread is active, so a post fetched shortly after
+# it was created is re-fetched once it goes stale. A post fetched after it settled is final.
+DEFAULT_REFRESH_AFTER_HOURS = 12
+DEFAULT_SETTLED_AFTER_DAYS = 3
+
+POST_COLUMNS = ['post_id', 'subreddit', 'title', 'body', 'score', 'num_comments',
+                'permalink', 'created_utc', 'deep_comments', 'fetched_at', 'comments_json']
+
+
+class RedditPostStore:
+    """
+    On-disk SQLite store of fetched posts and their comments, keyed by post_id.
+    Lets reruns skip replace_more()/comments.list() for posts that are already stored.
+    Safe to share between threads.
+    """
+
+    def __init__(self, db_path, refresh_after_hours=DEFAULT_REFRESH_AFTER_HOURS,
+                 settled_after_days=DEFAULT_SETTLED_AFTER_DAYS):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.refresh_after_seconds = refresh_after_hours * 3600
+        self.settled_after_seconds = settled_after_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                post_id TEXT PRIMARY KEY,
+                subreddit TEXT,
+                title TEXT,
+                body TEXT,
+                score INTEGER,
+                num_comments INTEGER,
+                permalink TEXT,
+                created_utc REAL,
+                deep_comments INTEGER,
+                fetched_at REAL,
+                comments_json TEXT
+            )""")
+        # Newest post already written to a player's outputs, per subreddit, for --incremental runs
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS high_water_marks (
+                player_name TEXT,
+                subreddit TEXT,
+                newest_created_utc REAL,
+                updated_at REAL,
+                PRIMARY KEY (player_name, subreddit)
+            )""")
+        self._conn.commit()
+        logging.info(f"Opened Reddit post store at {db_path}")
+
+    def get_post(self, post_id):
+        """Returns the stored post as a dict (comments decoded into a list), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(POST_COLUMNS, row))
+        record['deep_comments'] = bool(record['deep_comments'])
+        record['comments'] = json.loads(record.pop('comments_json') or '[]')
+        return record
+
+    def is_fresh(self, record, deep_comments, now=None):
+        """True if the stored comments can be reused instead of going back to the API."""
+        if deep_comments and not record['deep_comments']:
+            return False # Stored with top-level comments only
+        if record['fetched_at'] - record['created_utc'] >= self.settled_after_seconds:
+            return True
+        now = time.time() if now is None else now
+        return now - record['fetched_at'] < self.refresh_after_seconds
+
+    def save_post(self, record):
+        """Inserts or replaces a post record. Expects the keys of POST_COLUMNS with 'comments' as a list."""
+        values = dict(record)
+        values['comments_json'] = json.dumps(values.pop('comments', []), ensure_ascii=False)
+        values['deep_comments'] = int(bool(values.get('deep_comments')))
+        values.setdefault('fetched_at', time.time())
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO posts ({', '.join(POST_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in POST_COLUMNS)})",
+                [values.get(col) for col in POST_COLUMNS])
+            self._conn.commit()
+
+    def get_high_water_marks(self, player_name):
+        """Returns {subreddit: newest post created_utc already stored} for a player."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT subreddit, newest_created_utc FROM high_water_marks WHERE player_name = ?",
+                (player_name,)).fetchall()
+        return dict(rows)
+
+    def update_high_water_mark(self, player_name, subreddit, created_utc):
+        """Moves a player's mark for a subreddit forward to created_utc; never moves it back."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_created_utc FROM high_water_marks WHERE player_name = ? AND subreddit = ?",
+                (player_name, subreddit)).fetchone()
+            if row is not None and row[0] >= created_utc:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO high_water_marks (player_name, subreddit, newest_created_utc, updated_at) "
+                "VALUES (?, ?, ?, ?)", (player_name, subreddit, created_utc, time.time()))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
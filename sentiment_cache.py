@@ -0,0 +1,169 @@
+# sentiment_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_CACHE_PATH = 'data/new/sentiment_cache.sqlite3'
+CACHE_KEY_FORMAT = 2 # Bumped when normalize_for_scoring() changes, so older keys never match
+DEFAULT_MAX_ENTRIES = 2000000 # Least recently used scores are evicted past this
+WRITE_BATCH_SIZE = 1000 # New scores / last-used bumps buffered before a commit
+
+SCORE_KEYS = ('neg', 'neu', 'pos', 'compound')
+
+
+def normalize_for_scoring(text):
+    """
+    Canonical form of a text for the cache key: whitespace runs collapsed to one space. VADER
+    only sees a text through str.split() and its "!" / "?" counts, so this can't move a score.
+    Nothing else is folded: case and punctuation are emphasis to VADER, and even Unicode
+    normalization changes scores (a decomposed e + U+0301 passes VADER's one-character token
+    filter that a composed U+00E9 doesn't).
+    """
+    if not isinstance(text, str):
+        return ""
+    return ' '.join(text.split())
+
+
+def scorer_version(analyzer):
+    """Identifies the scorer, e.g. "nltk.sentiment.vader.SentimentIntensityAnalyzer/3.8.1"."""
+    scorer_class = type(analyzer)
+    package = sys.modules.get(scorer_class.__module__.split('.')[0])
+    return f"{scorer_class.__module__}.{scorer_class.__name__}/{getattr(package, '__version__', 'unknown')}"
+
+
+class SentimentCache:
+    """
+    Persistent content-addressed memo of sentiment scores: sha256(key format + scorer version +
+    normalized text) -> neg/neu/pos/compound, in SQLite. A text scored once is never scored
+    again by any stage until the scorer changes. Size-bounded by least-recent use. Safe to
+    share between threads; each process opens its own instance on the same file.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, version='', max_entries=DEFAULT_MAX_ENTRIES):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending_scores = {}
+        self._pending_touches = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                text_hash TEXT PRIMARY KEY,
+                neg REAL,
+                neu REAL,
+                pos REAL,
+                compound REAL,
+                last_used REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self._conn.commit()
+
+    def key(self, text):
+        return hashlib.sha256(f"{CACHE_KEY_FORMAT}\0{self.version}\0{normalize_for_scoring(text)}".encode('utf-8')).hexdigest()
+
+    def get(self, text):
+        """The cached scores dict for a text, or None."""
+        text_hash = self.key(text)
+        with self._lock:
+            scores = self._pending_scores.get(text_hash)
+            if scores is None:
+                row = self._conn.execute(
+                    "SELECT neg, neu, pos, compound FROM scores WHERE text_hash = ?", (text_hash,)).fetchone()
+                scores = dict(zip(SCORE_KEYS, row)) if row is not None else None
+                if scores is not None:
+                    self._pending_touches.add(text_hash)
+            if scores is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._maybe_flush()
+        return scores
+
+    def put(self, text, scores):
+        with self._lock:
+            self._pending_scores[self.key(text)] = {k: scores[k] for k in SCORE_KEYS}
+            self._maybe_flush()
+
+    def polarity_scores(self, text, analyzer):
+        """analyzer.polarity_scores(text), answered from the cache when the text was scored before."""
+        scores = self.get(text)
+        if scores is None:
+            scores = analyzer.polarity_scores(text)
+            self.put(text, scores)
+        return scores
+
+    def polarity_scores_batch(self, texts, batch_scorer):
+        """
+        polarity_scores() for a list of texts: cached ones are looked up, the rest are scored
+        together by batch_scorer.score_batch() (a vader_batch.VaderBatchScorer) and cached.
+        """
+        results = [self.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, scores in zip(texts, results) if scores is None))
+        if missing:
+            scored = {text: dict(zip(SCORE_KEYS, row))
+                      for text, row in zip(missing, batch_scorer.score_batch(missing).tolist())}
+            for text, scores in scored.items():
+                self.put(text, scores)
+            results = [scores if scores is not None else scored[text] for text, scores in zip(texts, results)]
+        return results
+
+    def _maybe_flush(self):
+        if len(self._pending_scores) + len(self._pending_touches) >= WRITE_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        now = time.time()
+        if self._pending_scores:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (text_hash, neg, neu, pos, compound, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                [(text_hash, *(scores[k] for k in SCORE_KEYS), now) for text_hash, scores in self._pending_scores.items()])
+        if self._pending_touches:
+            self._conn.executemany("UPDATE scores SET last_used = ? WHERE text_hash = ?",
+                                   [(now, text_hash) for text_hash in self._pending_touches])
+        self._conn.commit()
+        self._pending_scores = {}
+        self._pending_touches = set()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def evict(self):
+        """Drops the least recently used scores beyond max_entries. Returns how many were dropped."""
+        with self._lock:
+            self._flush()
+            count = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM scores WHERE text_hash IN (SELECT text_hash FROM scores ORDER BY last_used LIMIT ?)",
+                (excess,))
+            self._conn.commit()
+        logging.info(f"Evicted {excess} least recently used sentiment scores from {self.db_path}")
+        return excess
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (f"Sentiment cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate():.1%} hit rate) in {self.db_path}")
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._conn.close()
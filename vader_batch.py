@@ -0,0 +1,338 @@
+# vader_batch.py
+
+import string
+import sys
+
+import numpy as np
+
+SCORE_COLUMNS = ('neg', 'neu', 'pos', 'compound')
+
+_PUNCTUATION = frozenset(string.punctuation)
+_DELETE_PUNCTUATION = str.maketrans('', '', string.punctuation)
+# sum() of floats is Neumaier-compensated from Python 3.12 on; VADER's compound score uses sum()
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+# Per-token flag bits in the compiled table
+IN_LEXICON = 1
+UPPER = 2
+BOOSTER = 4
+NEGATED = 8
+KIND = 16
+OF = 32
+LEAST = 64
+AT_OR_VERY = 128
+BUT = 256
+
+SENTINEL_ID = 0 # "" - stands in for the neighbours of the first/last tokens; no flags
+
+
+def _round_like_python(values, ndigits):
+    """round(x, ndigits) for every element. np.round() only disagrees with it right at a .5 tie."""
+    rounded = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    for idx in np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6):
+        rounded.flat[idx] = round(float(values.flat[idx]), ndigits)
+    return rounded
+
+
+def _as_text_list(texts):
+    """A list, a pandas Series or a pyarrow (Chunked)Array of texts as a list. Arrow nulls become None."""
+    if hasattr(texts, 'to_pylist'):
+        return texts.to_pylist()
+    return list(texts)
+
+
+def score_rows_as_dicts(scores):
+    """The rows of a score_batch() result as polarity_scores()-style dicts."""
+    return [dict(zip(SCORE_COLUMNS, row)) for row in scores.tolist()]
+
+
+class VaderBatchScorer:
+    """
+    Scores many texts at once with the same results as nltk's
+    SentimentIntensityAnalyzer.polarity_scores().
+
+    Every distinct token is interned once into an integer id, with its lexicon valence,
+    booster scalar and negation/caps flags kept in parallel NumPy arrays (the VADER lexicon
+    and the booster/negation words are compiled in up front). A batch is tokenized exactly
+    like VADER's SentiText, flattened into one id array, and the valence rules - caps
+    emphasis, boosters up to 3 words back, negation, "never so", "least", "but" and the
+    punctuation amplifiers - run as array operations over all tokens of all texts together.
+
+    Texts containing one of VADER's special-case idioms ("the bomb", "yeah right", ...) and
+    anything that isn't a string are handed to the analyzer itself. None scores like "".
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        constants = analyzer.constants
+        self._lexicon = analyzer.lexicon
+        self._boosters = constants.BOOSTER_DICT
+        self._negations = constants.NEGATE
+        self._punc_list = frozenset(constants.PUNC_LIST)
+        self._n_scalar = constants.N_SCALAR
+        self._c_incr = constants.C_INCR
+        self._b_decr = constants.B_DECR
+
+        self._token_ids = {}
+        self._flags = []
+        self._valences = []
+        self._booster_scalars = []
+        self._compiled_size = 0
+        self._intern("")
+        for word in self._lexicon:
+            self._intern(word)
+        for word in list(self._boosters) + list(self._negations):
+            for token in word.split():
+                self._intern(token)
+
+        self._never_id = self._intern("never")
+        self._so_this_ids = np.array([self._intern("so"), self._intern("this")])
+        # VADER matches these phrases on the raw (case-sensitive) tokens
+        self._booster_bigrams = [tuple(self._intern(t) for t in phrase.split())
+                                 for phrase in self._boosters if phrase.count(' ') == 1]
+        self._idiom_openers = [tuple(self._intern(t) for t in phrase.split()[:2])
+                               for phrase in constants.SPECIAL_CASE_IDIOMS]
+
+    def _intern(self, token):
+        token_id = self._token_ids.get(token)
+        if token_id is not None:
+            return token_id
+        lower = token.lower()
+        flags = 0
+        valence = 0.0
+        booster_scalar = 0.0
+        if lower in self._lexicon:
+            flags |= IN_LEXICON
+            valence = self._lexicon[lower]
+        if token.isupper():
+            flags |= UPPER
+        if lower in self._boosters:
+            flags |= BOOSTER
+            booster_scalar = self._boosters[lower]
+        if lower in self._negations or "n't" in lower:
+            flags |= NEGATED
+        flags |= {'kind': KIND, 'of': OF, 'least': LEAST, 'at': AT_OR_VERY, 'very': AT_OR_VERY,
+                  'but': BUT}.get(lower, 0)
+        token_id = len(self._flags)
+        self._token_ids[token] = token_id
+        self._flags.append(flags)
+        self._valences.append(valence)
+        self._booster_scalars.append(booster_scalar)
+        return token_id
+
+    def _compiled_table(self):
+        """The token table as arrays, rebuilt only when new tokens were interned."""
+        if self._compiled_size != len(self._flags):
+            self._flag_array = np.array(self._flags, dtype=np.int64)
+            self._valence_array = np.array(self._valences, dtype=np.float64)
+            self._booster_array = np.array(self._booster_scalars, dtype=np.float64)
+            self._compiled_size = len(self._flags)
+        return self._flag_array, self._valence_array, self._booster_array
+
+    def tokenize(self, text):
+        """SentiText.words_and_emoticons: whitespace tokens of 2+ characters, minus punctuation around words."""
+        tokens = [token for token in text.split() if len(token) > 1]
+        words_only = None
+        for i, token in enumerate(tokens):
+            if token[0] in _PUNCTUATION or token[-1] in _PUNCTUATION:
+                if words_only is None:
+                    words_only = {w for w in text.translate(_DELETE_PUNCTUATION).split() if len(w) > 1}
+                tokens[i] = self._strip_punctuation(token, words_only)
+        return tokens
+
+    def _strip_punctuation(self, token, words_only):
+        # VADER only strips a PUNC_LIST mark from a word that also appears without punctuation
+        start = 0
+        while start < len(token) and token[start] in _PUNCTUATION:
+            start += 1
+        if start:
+            word, mark = token[start:], token[:start]
+        else:
+            end = len(token)
+            while token[end - 1] in _PUNCTUATION:
+                end -= 1
+            word, mark = token[:end], token[end:]
+        return word if mark in self._punc_list and word in words_only else token
+
+    def score_batch(self, texts):
+        """
+        Scores a list (or pandas Series / pyarrow array) of texts. Returns an (n, 4) float array
+        of neg, neu, pos, compound per text, rounded like polarity_scores().
+        """
+        texts = _as_text_list(texts)
+        scores = np.zeros((len(texts), len(SCORE_COLUMNS)))
+        intern, token_ids = self._intern, self._token_ids
+        rows, lengths, flat_ids, exclamations, questions, fallback = [], [], [], [], [], []
+        for row, text in enumerate(texts):
+            if text is None:
+                continue
+            if not isinstance(text, str):
+                fallback.append(row)
+                continue
+            ids = [token_ids[t] if t in token_ids else intern(t) for t in self.tokenize(text)]
+            if ids:
+                rows.append(row)
+                lengths.append(len(ids))
+                flat_ids.extend(ids)
+                exclamations.append(text.count("!"))
+                questions.append(text.count("?"))
+
+        if rows:
+            rows = np.array(rows)
+            lengths = np.array(lengths, dtype=np.int64)
+            token_id = np.array(flat_ids, dtype=np.int64)
+            scores[rows] = self._score_tokens(token_id, lengths, np.array(exclamations), np.array(questions))
+            for idx in np.flatnonzero(self._has_idiom(token_id, lengths)):
+                fallback.append(int(rows[idx]))
+
+        for row in fallback:
+            sentiment = self.analyzer.polarity_scores(texts[row])
+            scores[row] = [sentiment[k] for k in SCORE_COLUMNS]
+        return scores
+
+    def polarity_scores(self, text):
+        return dict(zip(SCORE_COLUMNS, self.score_batch([text])[0].tolist()))
+
+    def _has_idiom(self, token_id, lengths):
+        """Per text: does any idiom's first two words appear in it? (Those texts are scored by nltk.)"""
+        text_of = np.repeat(np.arange(len(lengths)), lengths)
+        pairs = np.zeros(len(token_id), dtype=bool)
+        for first, second in self._idiom_openers:
+            pairs[:-1] |= (token_id[:-1] == first) & (token_id[1:] == second) & (text_of[:-1] == text_of[1:])
+        return np.bincount(text_of[pairs], minlength=len(lengths)) > 0
+
+    def _score_tokens(self, token_id, lengths, exclamations, questions):
+        flag_table, valence_table, booster_table = self._compiled_table()
+        n_texts = len(lengths)
+        text_of = np.repeat(np.arange(n_texts), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = np.arange(len(token_id)) - starts[text_of]
+        text_length = lengths[text_of]
+
+        def neighbour(offset):
+            """Token ids `offset` places away within the same text; SENTINEL_ID past either end."""
+            shifted = np.full(len(token_id), SENTINEL_ID, dtype=np.int64)
+            if offset < 0:
+                shifted[-offset:] = token_id[:offset]
+            else:
+                shifted[:-offset] = token_id[offset:]
+            inside = (position + offset >= 0) & (position + offset < text_length)
+            return np.where(inside, shifted, SENTINEL_ID)
+
+        def has(flag, ids):
+            return (flag_table[ids] & flag) != 0
+
+        def is_so_or_this(ids):
+            return np.isin(ids, self._so_this_ids)
+
+        prev = [None, neighbour(-1), neighbour(-2), neighbour(-3)]
+        upper_count = np.bincount(text_of, weights=has(UPPER, token_id), minlength=n_texts)
+        cap_diff = ((lengths - upper_count > 0) & (lengths - upper_count < lengths))[text_of]
+
+        # SentimentIntensityAnalyzer.sentiment_valence(), for every token at once
+        scored = has(IN_LEXICON, token_id) & ~has(BOOSTER, token_id) & ~(has(KIND, token_id) & has(OF, neighbour(1)))
+        valence = valence_table[token_id]
+        caps = has(UPPER, token_id) & cap_diff
+        valence = np.where(caps, np.where(valence > 0, valence + self._c_incr, valence - self._c_incr), valence)
+        for start_i, dampening in enumerate((1.0, 0.95, 0.9)):
+            before = prev[start_i + 1]
+            applies = (position > start_i) & ~has(IN_LEXICON, before)
+            scalar = booster_table[before]
+            scalar = np.where(valence < 0, -scalar, scalar)
+            caps_booster = has(BOOSTER, before) & has(UPPER, before) & cap_diff
+            scalar = np.where(caps_booster, np.where(valence > 0, scalar + self._c_incr, scalar - self._c_incr), scalar)
+            if start_i:
+                scalar = np.where(scalar != 0, scalar * dampening, scalar)
+            valence = np.where(applies, valence + scalar, valence)
+
+            # _never_check()
+            if start_i == 0:
+                emphasis, factor = np.zeros(len(token_id), dtype=bool), 1.0
+            elif start_i == 1:
+                emphasis, factor = (prev[2] == self._never_id) & is_so_or_this(prev[1]), 1.5
+            else:
+                emphasis = ((prev[3] == self._never_id) & is_so_or_this(prev[2])) | is_so_or_this(prev[1])
+                factor = 1.25
+            valence = np.where(applies & emphasis, valence * factor,
+                               np.where(applies & has(NEGATED, before), valence * self._n_scalar, valence))
+
+            # _idioms_check(): only the "kind of" / "sort of" booster bigrams (idiom texts go to nltk)
+            if start_i == 2:
+                bigram = np.zeros(len(token_id), dtype=bool)
+                for first, second in self._booster_bigrams:
+                    bigram |= ((prev[3] == first) & (prev[2] == second)) | ((prev[2] == first) & (prev[1] == second))
+                valence = np.where(applies & bigram, valence + self._b_decr, valence)
+
+        # _least_check()
+        least = (position > 0) & ~has(IN_LEXICON, prev[1]) & has(LEAST, prev[1])
+        least &= (position == 1) | ~has(AT_OR_VERY, prev[2])
+        valence = np.where(least, valence * self._n_scalar, valence)
+        valence = np.where(scored, valence, 0.0)
+
+        # polarity_scores() looks every token up at its first index in the text
+        _, first_index, occurrence = np.unique(text_of * len(flag_table) + token_id,
+                                               return_index=True, return_inverse=True)
+        sentiments = valence[first_index][occurrence.reshape(-1)]
+
+        # _but_check(): halve what comes before the first "but", boost what comes after
+        but_at = np.flatnonzero(has(BUT, token_id))
+        if len(but_at):
+            but_texts, first_but = np.unique(text_of[but_at], return_index=True)
+            but_position = np.full(n_texts, -1)
+            but_position[but_texts] = position[but_at[first_but]]
+            but_position = but_position[text_of]
+            sentiments = np.where((but_position >= 0) & (position < but_position), sentiments * 0.5,
+                                  np.where((but_position >= 0) & (position > but_position), sentiments * 1.5, sentiments))
+
+        sum_s, pos_sum, neg_sum, neu_count = self._accumulate(sentiments, starts, lengths)
+        return self._score_valence(sum_s, pos_sum, neg_sum, neu_count, exclamations, questions)
+
+    def _accumulate(self, sentiments, starts, lengths):
+        """
+        Per text: sum(sentiments) and _sift_sentiment_scores(), adding token by token in text
+        order like the Python loops do, so the floats come out bit-for-bit the same. Texts are
+        walked longest first, so the texts still going at token k are a prefix.
+        """
+        order = np.argsort(-lengths, kind='stable')
+        ordered_starts = starts[order]
+        still_going = len(lengths) - np.cumsum(np.bincount(lengths))
+        total, compensation = np.zeros(len(lengths)), np.zeros(len(lengths))
+        pos_sum, neg_sum, neu_count = np.zeros(len(lengths)), np.zeros(len(lengths)), np.zeros(len(lengths))
+        for k in range(int(lengths.max())):
+            n = still_going[k]
+            x = sentiments[ordered_starts[:n] + k]
+            if _COMPENSATED_SUM:
+                t = total[:n] + x
+                compensation[:n] += np.where(np.abs(total[:n]) >= np.abs(x), (total[:n] - t) + x, (x - t) + total[:n])
+                total[:n] = t
+            else:
+                total[:n] += x
+            pos_sum[:n] += np.where(x > 0, x + 1, 0.0)
+            neg_sum[:n] += np.where(x < 0, x - 1, 0.0)
+            neu_count[:n] += x == 0
+        if _COMPENSATED_SUM:
+            total = np.where((compensation != 0) & np.isfinite(compensation), total + compensation, total)
+        unordered = np.empty_like(order)
+        unordered[order] = np.arange(len(order))
+        return total[unordered], pos_sum[unordered], neg_sum[unordered], neu_count[unordered]
+
+    def _score_valence(self, sum_s, pos_sum, neg_sum, neu_count, exclamations, questions):
+        """SentimentIntensityAnalyzer.score_valence(), vectorized over texts."""
+        punct_emph_amplifier = np.minimum(exclamations, 4) * 0.292
+        punct_emph_amplifier = punct_emph_amplifier + np.where(
+            questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+        sum_s = np.where(sum_s > 0, sum_s + punct_emph_amplifier,
+                         np.where(sum_s < 0, sum_s - punct_emph_amplifier, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+
+        more_positive = pos_sum > np.abs(neg_sum)
+        more_negative = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(more_positive, pos_sum + punct_emph_amplifier, pos_sum)
+        neg_sum = np.where(more_negative, neg_sum - punct_emph_amplifier, neg_sum)
+        total = pos_sum + np.abs(neg_sum) + neu_count
+        scores = np.column_stack([np.abs(neg_sum / total), np.abs(neu_count / total),
+                                  np.abs(pos_sum / total), compound])
+        scores[:, :3] = _round_like_python(scores[:, :3], 3)
+        scores[:, 3] = _round_like_python(scores[:, 3], 4)
+        return scores